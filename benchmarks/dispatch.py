@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Measures how fast TeleBot.process_new_updates routes updates to handlers.
+
+Usage: python benchmarks/dispatch.py [updates] [handlers]
+
+Also reports how the cost of routing a command grows with the number of command handlers,
+the cost of text that matches none of the regexp handlers and the cost of service messages no handler wants.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import telebot
+from telebot import types
+
+
+def make_update(update_id, text):
+    return types.Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 1435296025, 'text': text,
+            'from': {'id': 108929734, 'is_bot': False, 'first_name': 'Frank'},
+            'chat': {'id': 108929734, 'type': 'private', 'first_name': 'Frank'},
+        },
+    })
+
+
+def make_bot(handler_count):
+    bot = telebot.TeleBot('', threaded=False)
+    hits = []
+
+    def handler(message):
+        hits.append(message)
+
+    # A realistic mix of commands, regexps, content-type and func filters, as @message_handler registers them.
+    for i in range(handler_count):
+        kind = i % 4
+
+        if kind == 0:
+            bot.add_message_handler(bot._build_handler_dict(handler, commands=['cmd{0}'.format(i)], content_types=['text']))
+
+        elif kind == 1:
+            bot.add_message_handler(bot._build_handler_dict(handler, regexp='^word{0}$'.format(i), content_types=['text']))
+
+        elif kind == 2:
+            bot.add_message_handler(bot._build_handler_dict(handler, content_types=['document'], func=None))
+
+        else:
+            bot.add_message_handler(bot._build_handler_dict(
+                handler, func=lambda m, i=i: m.text == 'x{0}'.format(i), content_types=['text']
+            ))
+
+    return bot, hits
+
+
+def dispatch_rate(bot, updates):
+    batches = [updates[i:i + 100] for i in range(0, len(updates), 100)]
+
+    # Warm up: the dispatch tables are built on the first batch after registration.
+    bot.process_new_updates(batches[0])
+
+    start = time.perf_counter()
+
+    for batch in batches:
+        bot.process_new_updates(batch)
+
+    return len(updates) / (time.perf_counter() - start)
+
+
+def command_scaling(update_count):
+    for command_count in (10, 100, 1000, 10000):
+        bot = telebot.TeleBot('', threaded=False)
+
+        for i in range(command_count):
+            bot.add_message_handler(bot._build_handler_dict(lambda m: None, commands=['cmd{0}'.format(i)]))
+
+        updates = [make_update(i, '/cmd{0} arg'.format(i % command_count)) for i in range(update_count)]
+
+        print('{0:>6} commands: {1:.0f} updates/sec'.format(command_count, dispatch_rate(bot, updates)))
+
+
+def regexp_scaling(update_count):
+    for pattern_count in (10, 100, 1000):
+        bot = telebot.TeleBot('', threaded=False)
+
+        for i in range(pattern_count):
+            bot.add_message_handler(bot._build_handler_dict(lambda m: None, regexp='^word{0}\\b'.format(i)))
+
+        updates = [make_update(i, 'just some chatter') for i in range(update_count)]
+
+        print('{0:>6} regexps:  {1:.0f} updates/sec'.format(pattern_count, dispatch_rate(bot, updates)))
+
+
+def service_messages(bot, update_count):
+    updates = [types.Update.de_json({'update_id': i, 'message': {
+        'message_id': i, 'date': 1435296025, 'chat': {'id': -100, 'type': 'group', 'title': 'group'},
+        'new_chat_members': [{'id': i, 'is_bot': False, 'first_name': 'Frank'}],
+    }}) for i in range(update_count)]
+
+    print('service messages: {0:.0f} updates/sec'.format(dispatch_rate(bot, updates)))
+
+
+def main():
+    update_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    handler_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    bot, hits = make_bot(handler_count)
+    texts = ['/cmd{0}'.format(i) for i in range(0, handler_count, 4)]
+    texts += ['word{0}'.format(i) for i in range(1, handler_count, 4)]
+    texts += ['unmatched text']
+
+    updates = [make_update(i, texts[i % len(texts)]) for i in range(update_count)]
+    rate = dispatch_rate(bot, updates)
+
+    print('{0} updates through {1} handlers: {2:.0f} updates/sec, {3} handled'.format(
+        update_count, handler_count, rate, len(hits)))
+
+    service_messages(bot, update_count // 10)
+    command_scaling(update_count // 10)
+    regexp_scaling(update_count // 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the memory retained per deserialized Message.
+
+"slots" is the slotted Message as shipped, "dict" is the same set of types rebuilt without
+__slots__ (a __dict__ per instance, nested objects included), and "lazy" is LazyMessage,
+which builds nested objects on first access. slots vs dict is the saving from __slots__;
+slots vs lazy is the saving from deferred construction.
+
+Usage: python benchmarks/message_memory.py [count]
+"""
+
+import contextlib
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telebot import types
+
+
+MESSAGE = {
+    'message_id': 1, 'date': 1435296025, 'text': '/start hello there',
+    'from': {'id': 108929734, 'is_bot': False, 'first_name': 'Frank', 'last_name': 'Wang', 'username': 'frank'},
+    'chat': {'id': 108929734, 'type': 'private', 'first_name': 'Frank', 'last_name': 'Wang', 'username': 'frank'},
+    'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+}
+
+PHOTO_MESSAGE = dict(MESSAGE, photo=[
+    {'file_id': 'AgADBQADIagxG8YifgYv8yLSj76i-dd', 'width': 90, 'height': 67, 'file_size': 615},
+    {'file_id': 'AgADBQADIagxG8YifgYv8yLSj76i-de', 'width': 320, 'height': 240, 'file_size': 10174},
+])
+
+
+SLOTTED_TYPES = ('User', 'Chat', 'Message', 'MessageEntity', 'PhotoSize', 'CallbackQuery')
+
+
+def without_slots(cls):
+    """
+    Returns a copy of `cls` that stores its attributes in a per-instance __dict__.
+    """
+    namespace = dict((key, value) for key, value in vars(cls).items()
+                     if key not in cls.__slots__ and key not in ('__slots__', '__dict__', '__weakref__'))
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+@contextlib.contextmanager
+def dict_types():
+    """
+    Rebinds the slotted types in telebot.types to their __dict__-based copies, so nested
+    objects built by de_json are unslotted as well.
+    """
+    originals = dict((name, getattr(types, name)) for name in SLOTTED_TYPES)
+    try:
+        for name, cls in originals.items():
+            setattr(types, name, without_slots(cls))
+        yield types.Message
+    finally:
+        for name, cls in originals.items():
+            setattr(types, name, cls)
+
+
+def measure(cls, obj, count):
+    json_strings = [json.dumps(obj) for _ in range(count)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = [cls.de_json(json_string) for json_string in json_strings]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del messages
+
+    return (after - before) / float(count)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    for name, obj in (('text', MESSAGE), ('photo', PHOTO_MESSAGE)):
+        with dict_types() as dict_message:
+            unslotted = measure(dict_message, obj, count)
+        results = (
+            ('dict', unslotted),
+            ('slots', measure(types.Message, obj, count)),
+            ('lazy', measure(types.LazyMessage, obj, count)),
+        )
+        for label, size in results:
+            print('{0:<6} {1:<6} {2:8.0f} bytes/message'.format(name, label, size))
+
+
+if __name__ == '__main__':
+    main()
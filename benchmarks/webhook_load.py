@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for the webhook server: posts synthetic updates over keep-alive connections
+and reports acknowledgements per second and acknowledgement latency.
+
+Usage: python benchmarks/webhook_load.py [updates] [concurrency] [url]
+
+Without a url a local TeleBot with a no-op handler is started on a free port.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import aiohttp
+
+import telebot
+from telebot import util
+
+
+def make_update(update_id):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 1435296025, 'text': '/start hello',
+            'from': {'id': update_id % 1000, 'is_bot': False, 'first_name': 'Frank'},
+            'chat': {'id': update_id % 1000, 'type': 'private', 'first_name': 'Frank'},
+        },
+    }
+
+
+def start_local_bot():
+    bot = telebot.TeleBot('TOKEN')
+    handled = []
+    started = threading.Event()
+
+    @bot.message_handler(commands=['start'])
+    def start(message):
+        handled.append(message.message_id)
+
+    threading.Thread(target=bot.run_webhooks, kwargs={'listen': '127.0.0.1', 'port': 0, 'started': started}).start()
+    started.wait()
+
+    return bot, handled, 'http://127.0.0.1:{0}/TOKEN/'.format(bot.webhook_server.port)
+
+
+async def post_updates(url, update_count, concurrency):
+    latencies = []
+    update_ids = iter(range(1, update_count + 1))
+
+    async def client(session):
+        for update_id in update_ids:
+            start = time.perf_counter()
+
+            async with session.post(url, json=make_update(update_id)) as response:
+                await response.read()
+                assert response.status == 200, response.status
+
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[client(session) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies
+
+
+def main():
+    update_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    url = sys.argv[3] if len(sys.argv) > 3 else None
+    bot = handled = None
+
+    if url is None:
+        bot, handled, url = start_local_bot()
+
+    elapsed, latencies = asyncio.run(post_updates(url, update_count, concurrency))
+
+    print('{0} updates over {1} connections: {2:.0f} acks/sec, latency p50 {3:.1f} ms, p99 {4:.1f} ms'.format(
+        update_count, concurrency, update_count / elapsed,
+        util.percentile(latencies, 50) * 1000, util.percentile(latencies, 99) * 1000))
+
+    if bot is not None:
+        bot.stop_webhooks()
+
+        while len(handled) < update_count:
+            time.sleep(0.01)
+
+        bot.stop_bot()
+        print('{0} updates handled in {1} batches'.format(len(handled), bot.webhook_server.batches))
+
+
+if __name__ == '__main__':
+    main()
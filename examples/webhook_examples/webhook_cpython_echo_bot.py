@@ -65,7 +65,7 @@ class WebhookHandler(BaseHTTPRequestHandler):
             self.end_headers()
 
             update = telebot.types.Update.de_json(json_string)
-            bot.process_new_messages([update.message])
+            bot.process_new_updates([update])
         else:
             self.send_error(403)
             self.end_headers()
@@ -27,7 +27,8 @@ setup(
     keywords='telegram bot api tools',
     install_requires=['requests'],
     extras_require={
-        'redis': 'redis>=3.4.1'
+        'redis': 'redis>=3.4.1',
+        'aiohttp': 'aiohttp>=3.7'
     },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 
 
+import asyncio
+import concurrent.futures
+import heapq
+import inspect
 import logging
+import multiprocessing
 import re
+import ssl
 import sys
 import threading
 import time
+import queue as Queue
 import six
 
 from telebot.version import __version__
-from telebot import apihelper, types, util
+from telebot import apihelper, asyncio_helper, types, util, webhook_server
 from telebot.handler_backends import MemoryHandlerBackend, FileHandlerBackend
 
 
@@ -45,6 +52,177 @@ class Handler:
         return getattr(self, item)
 
 
+def _process_pool_context():
+    """
+    Worker processes are not forked from the bot's process: by then polling and handler threads are running,
+    and a child could inherit a lock one of them holds (logging, the requests pool) and deadlock on it.
+    As with any non-fork start method, the bot's script must start it under `if __name__ == '__main__':`.
+    """
+
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+
+    return multiprocessing.get_context('spawn')
+
+
+def _run_in_process(handler, obj_class, data):
+    """
+    Runs a handler with executor='process' in a worker process of TeleBot.process_pool.
+    """
+
+    return handler(obj_class.de_json(data) if obj_class else data)
+
+
+class HandlerIndex:
+    """
+    Dispatch table over a list of handler dicts.
+
+    Handlers are bucketed by the content types they accept, so e.g. a service message only tests the handlers
+    that can handle it. Text handlers with a `commands` filter are further indexed by command, so a message only
+    tests the handlers of its own command plus the handlers without one. The patterns of the `regexp` handlers
+    are joined into one alternation: a single search of the text rules all of them out when none matches.
+    Candidates are yielded in registration order.
+    """
+
+    GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+    DEFAULT_FLAGS = re.compile('', re.IGNORECASE).flags
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.size = len(handlers)
+        self.commands = {}
+        self.others = []
+
+        # Text candidates for text that matches none of the combined patterns.
+        self.others_no_regexp = []
+
+        # Candidates of the other content types, and of objects whose content type no handler names.
+        self.by_content_type = {}
+        self.any_content_type = []
+
+        entries = []
+        patterns = []
+
+        for position, handler_dict in enumerate(handlers):
+            filters = handler_dict['filters']
+            commands = filters.get('commands')
+            content_types = filters.get('content_types')
+
+            if content_types is not None:
+                content_types = frozenset(content_types)
+
+                for content_type in content_types:
+                    self.by_content_type.setdefault(content_type, [])
+
+            # The buckets and the command index already guarantee these filters.
+            test = TeleBot._compile_filters(
+                {k: v for k, v in six.iteritems(filters) if k not in ('commands', 'content_types')}
+            )
+
+            if commands is not None:
+                if content_types is None or 'text' in content_types:
+                    for command in frozenset(commands):
+                        self.commands.setdefault(command, []).append((position, handler_dict, test))
+
+                continue
+
+            entry = (position, handler_dict, test)
+            regexp = filters.get('regexp')
+
+            if content_types is None or 'text' in content_types:
+                self.others.append(entry)
+
+                if regexp is None or not self._add_pattern(patterns, regexp):
+                    self.others_no_regexp.append(entry)
+
+            if regexp is None:
+                entries.append((entry, content_types))
+
+        self.pattern = self._combine_patterns(patterns)
+
+        if self.pattern is None:
+            self.others_no_regexp = self.others
+
+        self.by_content_type.pop('text', None)
+
+        for content_type, bucket in six.iteritems(self.by_content_type):
+            bucket.extend(entry for entry, types_ in entries if types_ is None or content_type in types_)
+
+        self.any_content_type = [entry for entry, types_ in entries if types_ is None]
+
+    @staticmethod
+    def _add_pattern(patterns, regexp):
+        """
+        Adds `regexp` to the combined alternation unless it uses groups, whose numbering would shift once combined,
+        or global inline flags such as (?x), which would apply to every pattern of the alternation
+        (Python < 3.11 only warns about them in the middle of an expression).
+
+        :return: True if the pattern was added
+        """
+
+        if HandlerIndex.GLOBAL_FLAGS.match(regexp):
+            return False
+
+        try:
+            compiled = re.compile(regexp, re.IGNORECASE)
+
+        except re.error:
+            return False
+
+        if compiled.groups or compiled.flags != HandlerIndex.DEFAULT_FLAGS:
+            return False
+
+        patterns.append(regexp)
+
+        return True
+
+    @staticmethod
+    def _combine_patterns(patterns):
+        if not patterns:
+            return None
+
+        try:
+            return re.compile('|'.join('(?:{0})'.format(pattern) for pattern in patterns), re.IGNORECASE)
+
+        except re.error:
+            # e.g. global inline flags, which are only allowed at the start of an expression
+            return None
+
+    def is_stale(self, handlers):
+        return self.handlers is not handlers or self.size != len(handlers)
+
+    def candidates(self, obj):
+        """
+        Returns (position, handler_dict, test) entries that may match `obj`, in registration order.
+        """
+
+        content_type = getattr(obj, 'content_type', None)
+
+        if content_type != 'text':
+            return self.by_content_type.get(content_type, self.any_content_type)
+
+        text = obj.text
+
+        if self.pattern is None or self.pattern.search(text) is not None:
+            others = self.others
+
+        else:
+            others = self.others_no_regexp
+
+        if not self.commands:
+            return others
+
+        indexed = self.commands.get(util.extract_command(text))
+
+        if not indexed:
+            return others
+
+        if not others:
+            return indexed
+
+        return heapq.merge(indexed, others, key=lambda entry: entry[0])
+
+
 class TeleBot:
     """ This is TeleBot Class
 
@@ -89,14 +267,29 @@ class TeleBot:
         answerInlineQuery
         """
 
+    _uses_worker_pool = True
+
     def __init__(
         self, token, parse_mode=None, threaded=True, skip_pending=False, num_threads=2,
-        next_step_backend=None, reply_backend=None
+        next_step_backend=None, reply_backend=None, lazy_updates=False, chat_ordered=False,
+        max_queue_size=0, queue_full_policy='block', max_threads=None, num_processes=None
     ):
         """
         :param token: bot API token
         :param parse_mode: default parse_mode
         :param skip_pending: skip recurring messages
+        :param num_threads: number of handler threads
+        :param max_threads: grow the pool from `num_threads` up to `max_threads` threads under load,
+            shrinking back when idle (see util.ElasticThreadPool); not combined with chat_ordered
+        :param num_processes: size of the process pool of handlers registered with executor='process',
+            defaults to the number of CPUs; its processes are started with forkserver or spawn,
+            so start the bot under `if __name__ == '__main__':`
+        :param chat_ordered: run the handlers of each chat on a fixed thread out of `num_threads`,
+            so updates of the same chat are handled one at a time and in order
+        :param max_queue_size: maximum number of handler calls waiting for a thread, 0 for unbounded
+        :param queue_full_policy: 'block' (polling waits for the handlers), 'drop_oldest', 'reject',
+            or a callable called with (handler, args, kwargs) of each rejected call, see util.ThreadPool
+        :param lazy_updates: deserialize updates as LazyUpdate/LazyMessage, building nested objects on first access
         :return: Telebot object.
         """
 
@@ -104,12 +297,19 @@ class TeleBot:
         self.parse_mode = parse_mode
         self.update_listener = []
         self.skip_pending = skip_pending
-        self.__stop_polling = threading.Event()
+        self.__stop_polling = util.NotifyingEvent()
         self.last_update_id = 0
         self.exc_info = None
         self.next_step_backend = next_step_backend
         self.reply_backend = reply_backend
         self.threaded = threaded
+        self.chat_ordered = chat_ordered
+        self.num_processes = num_processes
+        self.process_pool = None
+        self.process_pool_lock = threading.Lock()
+        self.process_result_thread = None
+        self.webhook_server = None
+        self.update_class = types.LazyUpdate if lazy_updates else types.Update
 
         if not self.next_step_backend:
             self.next_step_backend = MemoryHandlerBackend()
@@ -129,6 +329,22 @@ class TeleBot:
         self.poll_handlers = []
         self.poll_answer_handlers = []
 
+        self._handler_indexes = {}
+
+        self._update_handlers = (
+            ('message', self.message_handlers),
+            ('edited_message', self.edited_message_handlers),
+            ('channel_post', self.channel_post_handlers),
+            ('edited_channel_post', self.edited_channel_post_handlers),
+            ('inline_query', self.inline_handlers),
+            ('chosen_inline_result', self.chosen_inline_handlers),
+            ('callback_query', self.callback_query_handlers),
+            ('shipping_query', self.shipping_query_handlers),
+            ('pre_checkout_query', self.pre_checkout_query_handlers),
+            ('poll', self.poll_handlers),
+            ('poll_answer', self.poll_answer_handlers),
+        )
+
         self.typed_middleware_handlers = {
             'message': [],
             'edited_message': [],
@@ -140,10 +356,25 @@ class TeleBot:
             'shipping_query': [],
             'pre_checkout_query': [],
             'poll': [],
+            'poll_answer': [],
         }
+        self.default_middleware_handlers = []
 
-        if self.threaded:
-            self.worker_pool = util.ThreadPool(num_threads=num_threads)
+        if self.threaded and self._uses_worker_pool:
+            if max_threads and not chat_ordered:
+                self.worker_pool = util.ElasticThreadPool(
+                    min_threads=num_threads, max_threads=max_threads,
+                    max_queue_size=max_queue_size, full_policy=queue_full_policy
+                )
+
+            else:
+                pool_class = util.ShardedThreadPool if chat_ordered else util.ThreadPool
+                self.worker_pool = pool_class(
+                    num_threads=num_threads, max_queue_size=max_queue_size, full_policy=queue_full_policy
+                )
+
+        else:
+            self.worker_pool = None
 
     def set_webhook(
         self, url=None, certificate=None, ip_address=None, max_connections=None,
@@ -153,6 +384,79 @@ class TeleBot:
             self.token, url, certificate, max_connections, allowed_updates, drop_pending_updates
         )
 
+    def run_webhooks(
+        self, listen='0.0.0.0', port=8443, url_path=None, certificate=None, certificate_key=None,
+        webhook_url=None, max_connections=None, allowed_updates=None, drop_pending_updates=None,
+        max_batch_size=100, max_batch_delay=0.005, started=None, reply_in_response=False
+    ):
+        """
+        Runs the built-in asyncio webhook server (requires aiohttp) until stop_webhooks() is called.
+        See webhook_server.WebhookServer.
+
+        :param listen: address to listen on
+        :param port: port to listen on, 0 picks a free one
+        :param url_path: secret path Telegram posts to, defaults to /<token>/
+        :param certificate: path of the SSL certificate, serves HTTPS when given together with certificate_key
+        :param certificate_key: path of the SSL private key
+        :param webhook_url: if given, set_webhook is called with it (uploading `certificate`) before serving
+        :param max_connections: passed to set_webhook
+        :param allowed_updates: passed to set_webhook
+        :param drop_pending_updates: passed to set_webhook
+        :param max_batch_size: maximum number of updates passed to one process_new_updates call
+        :param max_batch_delay: seconds to keep collecting updates after the first one before dispatching them
+        :param started: optional threading.Event set once the server accepts connections
+        :param reply_in_response: handle each update before acknowledging it and send the first reply of its
+            handler in the webhook response instead of a separate request (not for AsyncTeleBot)
+        """
+
+        if url_path is None:
+            url_path = '/{0}/'.format(self.token)
+
+        ssl_context = None
+
+        if certificate and certificate_key:
+            ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            ssl_context.load_cert_chain(certificate, certificate_key)
+
+        self.webhook_server = webhook_server.WebhookServer(
+            self, url_path, max_batch_size=max_batch_size, max_batch_delay=max_batch_delay,
+            reply_in_response=reply_in_response
+        )
+
+        async def set_webhook(certificate_file=None):
+            result = self.set_webhook(
+                url=webhook_url, certificate=certificate_file, max_connections=max_connections,
+                allowed_updates=allowed_updates, drop_pending_updates=drop_pending_updates
+            )
+
+            if inspect.isawaitable(result):
+                await result
+
+        async def serve():
+            try:
+                if webhook_url and certificate:
+                    with open(certificate, 'rb') as certificate_file:
+                        await set_webhook(certificate_file)
+
+                elif webhook_url:
+                    await set_webhook()
+
+                await self.webhook_server.serve(listen, port, ssl_context, started)
+
+            finally:
+                # The loop is closed by asyncio.run, so the session an AsyncTeleBot used on it is closed here.
+                await asyncio_helper.close_session()
+
+        try:
+            asyncio.run(serve())
+
+        except KeyboardInterrupt:
+            logger.info("KeyboardInterrupt received.")
+
+    def stop_webhooks(self):
+        if self.webhook_server is not None:
+            self.webhook_server.stop()
+
     def delete_webhook(self, drop_pending_updates=None):
         """
         Use this method to remove webhook integration if you decide to switch back to getUpdates.
@@ -185,7 +489,7 @@ class TeleBot:
         ret = []
 
         for ju in json_updates:
-            ret.append(types.Update.de_json(ju))
+            ret.append(self.update_class.de_json(ju))
 
         return ret
 
@@ -227,118 +531,120 @@ class TeleBot:
         self.process_new_updates(updates)
 
     def process_new_updates(self, updates):
+        """
+        Dispatches a batch of updates in a single pass.
+        Default middlewares receive the whole update. Each update carries exactly one object,
+        which goes through its typed middlewares and is then routed to the first matching handler of its type.
+        Update listeners receive all new messages of the batch at once.
+        On threads that set `util.thread_local.isolate_update_errors` (the webhook server does), an update whose
+        middlewares or handlers raise is logged and the rest of the batch is still dispatched.
+
+        :param updates: list of Update
+        """
+
         new_messages = []
-        new_edited_messages = []
-        new_channel_posts = []
-        new_edited_channel_posts = []
-        new_inline_querys = []
-        new_chosen_inline_results = []
-        new_callback_querys = []
-        new_shipping_querys = []
-        new_pre_checkout_querys = []
-        new_polls = []
-        new_poll_answers = []
 
         for update in updates:
-            args = self.process_middlewares(update)
-
-            if update.update_id > self.last_update_id:
-                self.last_update_id = update.update_id
-            if update.message:
-                new_messages.append([update.message, args])
-            if update.edited_message:
-                new_edited_messages.append([update.edited_message, args])
-            if update.channel_post:
-                new_channel_posts.append([update.channel_post, args])
-            if update.edited_channel_post:
-                new_edited_channel_posts.append([update.edited_channel_post, args])
-            if update.inline_query:
-                new_inline_querys.append([update.inline_query, args])
-            if update.chosen_inline_result:
-                new_chosen_inline_results.append([update.chosen_inline_result, args])
-            if update.callback_query:
-                new_callback_querys.append([update.callback_query, args])
-            if update.shipping_query:
-                new_shipping_querys.append([update.shipping_query, args])
-            if update.pre_checkout_query:
-                new_pre_checkout_querys.append([update.pre_checkout_query, args])
-            if update.poll:
-                new_polls.append([update.poll, args])
-            if update.poll_answer:
-                new_poll_answers.append([update.poll_answer, args])
+            try:
+                self._dispatch_update(update, new_messages)
+
+            except Exception:
+                if not getattr(util.thread_local, 'isolate_update_errors', False):
+                    raise
+
+                logger.exception("Exception while dispatching update {0}".format(update.update_id))
 
         logger.debug('Received {0} new updates'.format(len(updates)))
 
-        if not new_messages:
-            self.process_new_messages(new_messages)
-        if not new_edited_messages:
-            self.process_new_edited_messages(new_edited_messages)
-        if not new_channel_posts:
-            self.process_new_channel_posts(new_channel_posts)
-        if not new_edited_channel_posts:
-            self.process_new_edited_channel_posts(new_edited_channel_posts)
-        if not new_inline_querys:
-            self.process_new_inline_query(new_inline_querys)
-        if not new_chosen_inline_results:
-            self.process_new_chosen_inline_query(new_chosen_inline_results)
-        if not new_callback_querys:
-            self.process_new_callback_query(new_callback_querys)
-        if not new_shipping_querys:
-            self.process_new_shipping_query(new_shipping_querys)
-        if not new_pre_checkout_querys:
-            self.process_new_pre_checkout_query(new_pre_checkout_querys)
-        if not new_polls:
-            self.process_new_poll(new_polls)
-        if not new_poll_answers:
-            self.process_new_poll_answer(new_poll_answers)
+        if new_messages:
+            self.__notify_update(new_messages)
+
+    def _dispatch_update(self, update, new_messages):
+        if update.update_id > self.last_update_id:
+            self.last_update_id = update.update_id
+
+        for middleware in self.default_middleware_handlers:
+            middleware(self, update)
+
+        for update_type, handlers in self._update_handlers:
+            obj = getattr(update, update_type)
+
+            if obj is None:
+                continue
+
+            self.process_middlewares(update_type, obj)
+
+            if update_type == 'message':
+                new_messages.append(obj)
+                self._process_new_message(obj)
+
+            else:
+                self._notify_command_handlers(handlers, obj)
+
+            return
+
+    def _process_new_message(self, message):
+        self._notify_reply_handlers(message)
+
+        if not self._notify_next_handlers(message):
+            self._notify_command_handlers(self.message_handlers, message)
 
     def process_new_messages(self, new_messages):
-        for i in new_messages:
-            self._notify_next_handlers(i)
-            self._notify_reply_handlers(i)
-            self.__notify_update(i)
-            self._notify_command_handlers(self.message_handlers, i)
+        for message in new_messages:
+            self._process_new_message(message)
+
+        self.__notify_update(new_messages)
 
     def process_new_edited_messages(self, edited_message):
-        for i in edited_message:
-            self._notify_command_handlers(self.edited_message_handlers, i)
+        for message in edited_message:
+            self._notify_command_handlers(self.edited_message_handlers, message)
 
     def process_new_channel_posts(self, channel_post):
-        self._notify_command_handlers(self.channel_post_handlers, channel_post)
+        for message in channel_post:
+            self._notify_command_handlers(self.channel_post_handlers, message)
 
     def process_new_edited_channel_posts(self, edited_channel_post):
-        self._notify_command_handlers(self.edited_channel_post_handlers, edited_channel_post)
+        for message in edited_channel_post:
+            self._notify_command_handlers(self.edited_channel_post_handlers, message)
 
     def process_new_inline_query(self, new_inline_querys):
-        self._notify_command_handlers(self.inline_handlers, new_inline_querys)
+        for inline_query in new_inline_querys:
+            self._notify_command_handlers(self.inline_handlers, inline_query)
 
     def process_new_chosen_inline_query(self, new_chosen_inline_querys):
-        self._notify_command_handlers(self.chosen_inline_handlers, new_chosen_inline_querys)
+        for chosen_inline_result in new_chosen_inline_querys:
+            self._notify_command_handlers(self.chosen_inline_handlers, chosen_inline_result)
 
     def process_new_callback_query(self, new_callback_querys):
-        self._notify_command_handlers(self.callback_query_handlers, new_callback_querys)
+        for callback_query in new_callback_querys:
+            self._notify_command_handlers(self.callback_query_handlers, callback_query)
 
     def process_new_shipping_query(self, new_shipping_querys):
-        self._notify_command_handlers(self.shipping_query_handlers, new_shipping_querys)
+        for shipping_query in new_shipping_querys:
+            self._notify_command_handlers(self.shipping_query_handlers, shipping_query)
 
     def process_new_pre_checkout_query(self, pre_checkout_querys):
-        self._notify_command_handlers(self.pre_checkout_query_handlers, pre_checkout_querys)
+        for pre_checkout_query in pre_checkout_querys:
+            self._notify_command_handlers(self.pre_checkout_query_handlers, pre_checkout_query)
 
     def process_new_poll(self, polls):
-        self._notify_command_handlers(self.poll_handlers, polls)
+        for poll in polls:
+            self._notify_command_handlers(self.poll_handlers, poll)
 
     def process_new_poll_answer(self, poll_answers):
-        self._notify_command_handlers(self.poll_answer_handlers, poll_answers)
+        for poll_answer in poll_answers:
+            self._notify_command_handlers(self.poll_answer_handlers, poll_answer)
 
-    def process_middlewares(self, update):
-        if len(self.typed_middleware_handlers.items()) > 0:
-            for update_type, middlewares in self.typed_middleware_handlers.items():
-                if getattr(update, update_type) is not None:
-                    for typed_middleware_handler in middlewares:
-                        return typed_middleware_handler(getattr(update, update_type))
+    def process_middlewares(self, update_type, obj):
+        """
+        Runs the middlewares registered for `update_type` on `obj`.
 
-        else:
-            return update
+        :param update_type: attribute name of `obj` in its Update, e.g. 'message'
+        :param obj: the object the update carries
+        """
+
+        for middleware in self.typed_middleware_handlers.get(update_type, ()):
+            middleware(self, obj)
 
     def __notify_update(self, new_messages):
         for listener in self.update_listener:
@@ -356,7 +662,7 @@ class TeleBot:
 
         logger.info("Break infinity polling")
 
-    def polling(self, none_stop=False, interval=0, timeout=20):
+    def polling(self, none_stop=False, interval=0, timeout=20, pipelined=False):
         """
         This function creates a new Thread that calls an internal __retrieve_updates function.
         This allows the bot to retrieve Updates automagically and notify listeners and message handlers accordingly.
@@ -367,10 +673,14 @@ class TeleBot:
         :param interval:
         :param none_stop: Do not stop polling when an ApiException occurs.
         :param timeout: Timeout in seconds for long polling.
+        :param pipelined: Request the next batch of updates while the current one is deserialized and dispatched.
         :return:
         """
 
-        if self.threaded:
+        if pipelined:
+            self.__pipelined_polling(none_stop, interval, timeout)
+
+        elif self.threaded:
             self.__threaded_polling(none_stop, interval, timeout)
 
         else:
@@ -383,24 +693,58 @@ class TeleBot:
 
         polling_thread = util.WorkerThread(name="PollingThread")
 
-        or_event = util.OrEvent(
+        # The OrEvent listens to long-lived events, so it is detached again when polling stops.
+        with util.OrEvent(
             polling_thread.done_event,
             polling_thread.exception_event,
-            self.worker_pool.exception_event
-        )
+            self.worker_pool.exception_event,
+            self.__stop_polling
+        ) as or_event:
+            while not self.__stop_polling.is_set():
+                or_event.clear()
 
-        while not self.__stop_polling.wait():
-            or_event.clear()
+                try:
+                    polling_thread.put(self.__retrieve_updates, timeout)
 
-            try:
-                polling_thread.put(self.__retrieve_updates, timeout)
+                    or_event.wait()  # wait for polling thread finish, polling thread error, thread pool error or stop
+
+                    polling_thread.raise_exceptions()
+
+                    self.worker_pool.raise_exceptions()
 
-                or_event.wait()  # wait for polling thread finish, polling thread error or thread pool error
+                    error_interval = 0.25
 
-                polling_thread.raise_exceptions()
+                except apihelper.ApiException as e:
+                    logger.error(e)
 
-                self.worker_pool.raise_exceptions()
+                    if not none_stop:
+                        self.__stop_polling.set()
+                        logger.info("Exception occurred. Stopping.")
 
+                    else:
+                        polling_thread.clear_exceptions()
+                        self.worker_pool.clear_exceptions()
+                        logger.info("Waiting for {0} seconds until retry".format(error_interval))
+                        time.sleep(error_interval)
+                        error_interval *= 2
+
+                except KeyboardInterrupt:
+                    logger.info("KeyboardInterrupt received.")
+                    self.__stop_polling.set()
+
+                    break
+
+        polling_thread.stop()
+        logger.info('Stopped polling.')
+
+    def __non_threaded_polling(self, none_stop=False, interval=0, timeout=3):
+        logger.info('Started polling.')
+        self.__stop_polling.clear()
+        error_interval = 0.25
+
+        while not self.__stop_polling.is_set():
+            try:
+                self.__retrieve_updates(timeout)
                 error_interval = 0.25
 
             except apihelper.ApiException as e:
@@ -411,8 +755,6 @@ class TeleBot:
                     logger.info("Exception occurred. Stopping.")
 
                 else:
-                    polling_thread.clear_exceptions()
-                    self.worker_pool.clear_exceptions()
                     logger.info("Waiting for {0} seconds until retry".format(error_interval))
                     time.sleep(error_interval)
                     error_interval *= 2
@@ -423,17 +765,48 @@ class TeleBot:
 
                 break
 
-        polling_thread.stop()
         logger.info('Stopped polling.')
 
-    def __non_threaded_polling(self, none_stop=False, interval=0, timeout=3):
-        logger.info('Started polling.')
+    def __pipelined_polling(self, none_stop=False, interval=0, timeout=3):
+        """
+        Long polls on this thread and deserializes and dispatches each batch on a DispatchThread,
+        so the next getUpdates is already in flight while the current batch is processed.
+
+        The offset of the next request is taken from the raw batch, which confirms it to Telegram before it has been
+        dispatched. At most one batch waits for the dispatch thread; stopping lets it dispatch what was confirmed.
+        """
+
+        logger.info('Started pipelined polling.')
         self.__stop_polling.clear()
         error_interval = 0.25
 
-        while not self.__stop_polling.wait():
+        if self.skip_pending:
+            logger.debug('Skipped {0} pending messages'.format(self.__skip_updates()))
+
+            self.skip_pending = False
+
+        dispatch_thread = util.WorkerThread(self._continue_after_exception, Queue.Queue(1), "DispatchThread")
+        offset = self.last_update_id + 1
+        pending = None
+
+        while not self.__stop_polling.is_set():
             try:
-                self.__retrieve_updates(timeout)
+                # A batch that could not be queued because the dispatcher failed is queued before fetching more.
+                if pending is None:
+                    pending = apihelper.get_updates(self.token, offset, None, timeout, None) or None
+
+                    if pending:
+                        offset = pending[-1]['update_id'] + 1
+
+                if pending:
+                    self.__queue_dispatch(dispatch_thread, pending)
+                    pending = None
+
+                dispatch_thread.raise_exceptions()
+
+                if self.threaded:
+                    self.worker_pool.raise_exceptions()
+
                 error_interval = 0.25
 
             except apihelper.ApiException as e:
@@ -444,6 +817,11 @@ class TeleBot:
                     logger.info("Exception occurred. Stopping.")
 
                 else:
+                    dispatch_thread.clear_exceptions()
+
+                    if self.threaded:
+                        self.worker_pool.clear_exceptions()
+
                     logger.info("Waiting for {0} seconds until retry".format(error_interval))
                     time.sleep(error_interval)
                     error_interval *= 2
@@ -454,21 +832,145 @@ class TeleBot:
 
                 break
 
+        drained = threading.Event()
+        dispatch_thread.clear_exceptions()
+
+        if pending:
+            dispatch_thread.put(self.__process_json_updates, pending)
+
+        dispatch_thread.put(drained.set)
+        drained.wait()
+        dispatch_thread.stop()
+
         logger.info('Stopped polling.')
 
+    @staticmethod
+    def _continue_after_exception(worker_thread, exc_info):
+        """
+        exception_callback of a WorkerThread that goes on with its next task after an exception;
+        the exception stays in `exc_info` for the thread's owner to raise.
+        """
+
+        worker_thread.continue_event.set()
+
+    def __queue_dispatch(self, dispatch_thread, json_updates):
+        """
+        Waits for the dispatch thread to take the previous batch, raising its exceptions meanwhile.
+        """
+
+        while True:
+            try:
+                dispatch_thread.queue.put((self.__process_json_updates, (json_updates,), {}), timeout=0.5)
+
+                return
+
+            except Queue.Full:
+                dispatch_thread.raise_exceptions()
+
+    def __process_json_updates(self, json_updates):
+        self.process_new_updates([self.update_class.de_json(ju) for ju in json_updates])
+
     def _exec_task(self, task, *args, **kwargs):
-        if self.threaded:
-            self.worker_pool.put(task, *args, **kwargs)
+        if self.threaded and not getattr(util.thread_local, 'run_tasks_inline', False):
+            if self.chat_ordered and args:
+                self.worker_pool.put_keyed(self._get_chat_key(args[0]), task, *args, **kwargs)
+
+            else:
+                self.worker_pool.put(task, *args, **kwargs)
 
         else:
             task(*args, **kwargs)
 
+    def _exec_process_task(self, handler_dict, obj):
+        """
+        Runs the handler of `handler_dict` on `obj` in the process pool.
+
+        Objects that keep the JSON they were built from are shipped as that JSON and rebuilt in the worker process,
+        so changes made to them by middlewares do not reach the handler. The handler and its return value must be
+        picklable; the return value is passed to the `on_result` callback of the handler, if any, in this process.
+        """
+
+        with self.process_pool_lock:
+            if self.process_result_thread is None:
+                # Handing a result to the worker pool can block on a full queue; doing that on the executor's
+                # own thread would hold up every other result.
+                self.process_result_thread = util.WorkerThread(
+                    self._continue_after_exception, name="ProcessResultThread"
+                )
+
+        future = self._submit_process_task(handler_dict, obj)
+        future.add_done_callback(
+            lambda f: self.process_result_thread.put(self._on_process_result, handler_dict, obj, f)
+        )
+
+    def _submit_process_task(self, handler_dict, obj):
+        with self.process_pool_lock:
+            if self.process_pool is None:
+                self.process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.num_processes, mp_context=_process_pool_context()
+                )
+
+        data = getattr(obj, 'json', None)
+
+        if isinstance(data, dict):
+            return self.process_pool.submit(_run_in_process, handler_dict['function'], type(obj), data)
+
+        return self.process_pool.submit(_run_in_process, handler_dict['function'], None, obj)
+
+    def _on_process_result(self, handler_dict, obj, future):
+        try:
+            result = future.result()
+
+        except Exception as e:
+            logger.error("{0} occurred in process handler {1}: {2}".format(
+                type(e).__name__, handler_dict['function'].__name__, e
+            ))
+
+            return
+
+        on_result = handler_dict.get('on_result')
+
+        if on_result is not None:
+            self._exec_task(on_result, obj, result)
+
+    @staticmethod
+    def _get_chat_key(obj):
+        """
+        Returns the id of the chat `obj` belongs to: the chat of a message,
+        the chat of the message of a callback query, or else the user that caused the update.
+
+        :param obj: the object an update carries
+        :return: chat or user id, or None for updates without one (e.g. polls)
+        """
+
+        chat = getattr(obj, 'chat', None)
+
+        if chat is None:
+            message = getattr(obj, 'message', None)
+            chat = getattr(message, 'chat', None)
+
+        if chat is not None:
+            return chat.id
+
+        user = getattr(obj, 'from_user', None) or getattr(obj, 'user', None)
+
+        return getattr(user, 'id', None)
+
     def stop_polling(self):
         self.__stop_polling.set()
 
     def stop_bot(self):
         self.stop_polling()
 
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+        if self.process_result_thread is not None:
+            drained = threading.Event()
+            self.process_result_thread.put(drained.set)
+            drained.wait()
+            self.process_result_thread.stop()
+
         if self.worker_pool:
             self.worker_pool.close()
 
@@ -498,6 +1000,30 @@ class TeleBot:
     def download_file(self, file_path):
         return apihelper.download_file(self.token, file_path)
 
+    def download_file_to(self, file_path, destination, chunk_size=None, resume=False):
+        """
+        Streams a file to disk or to a file object without holding it in memory.
+
+        :param file_path: file_path of a File returned by get_file
+        :param destination: path or writable binary file object
+        :param chunk_size: bytes per chunk, defaults to apihelper.DOWNLOAD_CHUNK_SIZE
+        :param resume: continue a partial download with a Range request
+        :return: number of bytes written
+        """
+
+        return apihelper.download_file_to(self.token, file_path, destination, chunk_size, resume)
+
+    def iter_download_file(self, file_path, chunk_size=None, offset=0):
+        """
+        Streams a file as an iterator of bytes chunks.
+
+        :param file_path: file_path of a File returned by get_file
+        :param chunk_size: bytes per chunk, defaults to apihelper.DOWNLOAD_CHUNK_SIZE
+        :param offset: byte to start at
+        """
+
+        return apihelper.iter_download_file(self.token, file_path, chunk_size, offset)
+
     def get_user_profile_photos(self, user_id, offset=None, limit=None):
         """
         Retrieves the user profile photos of the person with 'user_id'
@@ -1813,20 +2339,19 @@ class TeleBot:
 
         self.reply_backend.register_handler(message_id, Handler(callback, *args, **kwargs))
 
-    def _notify_reply_handlers(self, new_messages):
+    def _notify_reply_handlers(self, message):
         """
         Notify handlers of the answers
 
-        :param new_messages:
+        :param message:
         :return:
         """
 
-        for message in new_messages:
-            if hasattr(message, "reply_to_message") and message.reply_to_message:
-                handlers = self.reply_backend.get_handlers(message.reply_to_message.message_id)
+        if message.reply_to_message:
+            handlers = self.reply_backend.get_handlers(message.reply_to_message.message_id)
 
-                for handler in handlers:
-                    self._exec_task(handler["callback"], message, *handler["args"], **handler["kwargs"])
+            for handler in handlers:
+                self._exec_task(handler["callback"], message, *handler["args"], **handler["kwargs"])
 
     def register_next_step_handler(self, message, callback, *args, **kwargs):
         """
@@ -1898,40 +2423,49 @@ class TeleBot:
 
         self.reply_backend.clear_handlers(message_id)
 
-    def _notify_next_handlers(self, new_messages):
+    def _notify_next_handlers(self, message):
         """
-        Description: TBD
+        Notifies the next step handlers registered for the chat of `message`.
 
-        :param new_messages:
-        :return:
+        :param message:
+        :return: True if the message was consumed by a next step handler
         """
 
-        for i, message in enumerate(new_messages):
-            need_pop = False
-            handlers = self.next_step_backend.get_handlers(message.chat.id)
+        handlers = self.next_step_backend.get_handlers(message.chat.id)
 
-            for handler in handlers:
-                need_pop = True
-                self._exec_task(handler["callback"], message, *handler["args"], **handler["kwargs"])
+        for handler in handlers:
+            self._exec_task(handler["callback"], message, *handler["args"], **handler["kwargs"])
 
-            if need_pop:
-                new_messages.pop(i)
+        return bool(handlers)
 
     @staticmethod
-    def _build_handler_dict(handler, **filters):
+    def _build_handler_dict(handler, executor=None, on_result=None, **filters):
         """
         Builds a dictionary for a handler
 
         :param handler:
+        :param executor: 'thread' (default) or 'process' to run a CPU-bound handler in a worker process
+        :param on_result: for executor='process', called in the bot's process with the object and the handler's
+            return value
         :param filters:
         :return:
         """
 
-        return {
+        if executor not in (None, 'thread', 'process'):
+            raise ValueError("executor must be 'thread' or 'process'")
+
+        handler_dict = {
             'function': handler,
-            'filters': filters
+            'filters': filters,
+            'test': TeleBot._compile_filters(filters)
         }
 
+        if executor == 'process':
+            handler_dict['executor'] = executor
+            handler_dict['on_result'] = on_result
+
+        return handler_dict
+
     def middleware_handler(self, update_types=None):
         """
         Middleware handler decorator.
@@ -1978,7 +2512,7 @@ class TeleBot:
                 self.typed_middleware_handlers[update_type].append(handler)
 
         else:
-            self.typed_middleware_handlers['message'].append(handler)
+            self.default_middleware_handlers.append(handler)
 
     def message_handler(self, commands=None, regexp=None, func=None, content_types=None, **kwargs):
         """
@@ -2009,6 +2543,8 @@ class TeleBot:
         :param regexp: Optional regular expression.
         :param func: Optional lambda function. The lambda receives the message to test as the first parameter. It must return True if the command should handle the message.
         :param content_types: This commands' supported content types. Must be a list. Defaults to ['text'].
+        :param kwargs: executor='process' runs a CPU-bound handler in a worker process;
+            on_result=callback(message, result) then receives its return value (see _build_handler_dict).
         """
 
         if not content_types:
@@ -2356,7 +2892,7 @@ class TeleBot:
 
         self.poll_answer_handlers.append(handler_dict)
 
-    def _test_message_handler(self, message_handler, *args):
+    def _test_message_handler(self, message_handler, message):
         """
         Test message handler
 
@@ -2365,301 +2901,565 @@ class TeleBot:
         :return:
         """
 
-        message = args[0][0]
+        return self._get_handler_test(message_handler)(message)
 
-        for message_filter, filter_value in six.iteritems(message_handler['filters']):
-            if filter_value is None:
-                continue
+    @classmethod
+    def _get_handler_test(cls, handler_dict):
+        """
+        Returns the compiled test of a handler, compiling it on first use for handler dicts built by hand.
+
+        :param handler_dict:
+        :return: callable taking the update object and returning whether the handler matches
+        """
 
-            if not self._test_filter(message_filter, filter_value, message):
-                return False
+        test = handler_dict.get('test')
 
-        return True
+        if test is None:
+            test = handler_dict['test'] = cls._compile_filters(handler_dict['filters'])
+
+        return test
+
+    @classmethod
+    def _compile_filters(cls, filters):
+        """
+        Compiles the filters of a handler into a single test, cheapest checks first.
+
+        :param filters:
+        :return:
+        """
+
+        tests = [
+            cls._compile_filter(message_filter, filter_value)
+            for message_filter, filter_value in sorted(six.iteritems(filters), key=lambda f: cls._filter_order(f[0]))
+            if filter_value is not None
+        ]
+
+        if not tests:
+            return lambda obj: True
+
+        if len(tests) == 1:
+            return tests[0]
+
+        return lambda obj: all(test(obj) for test in tests)
+
+    @staticmethod
+    def _filter_order(message_filter):
+        order = ('content_types', 'commands', 'regexp', 'func')
+
+        return order.index(message_filter) if message_filter in order else -1
 
     @staticmethod
-    def _test_filter(message_filter, filter_value, message):
+    def _compile_filter(message_filter, filter_value):
         """
-        Test filters
+        Compiles a single filter
 
         :param message_filter:
         :param filter_value:
-        :param message:
         :return:
         """
 
-        test_cases = {
-            'content_types': lambda msg: msg.content_type in filter_value,
-            'regexp': lambda msg: msg.content_type == 'text' and re.search(filter_value, msg.text, re.IGNORECASE),
-            'commands': lambda msg: msg.content_type == 'text' and util.extract_command(msg.text) in filter_value,
-            'func': lambda msg: filter_value(msg)
-        }
+        if message_filter == 'content_types':
+            content_types = frozenset(filter_value)
+
+            return lambda msg: msg.content_type in content_types
+
+        if message_filter == 'commands':
+            commands = frozenset(filter_value)
+
+            return lambda msg: msg.content_type == 'text' and util.extract_command(msg.text) in commands
+
+        if message_filter == 'regexp':
+            pattern = re.compile(filter_value, re.IGNORECASE)
+
+            return lambda msg: msg.content_type == 'text' and pattern.search(msg.text) is not None
+
+        if message_filter == 'func':
+            return filter_value
 
-        return test_cases.get(message_filter, lambda msg: False)(message)
+        return lambda msg: False
 
     def _notify_command_handlers(self, handlers, message):
         """
-        Notifies command handlers
+        Notifies the first matching handler
 
         :param handlers:
-        :param new_messages:
+        :param message:
         :return:
         """
 
-        for message_handler in handlers:
-            if self._test_message_handler(message_handler, message):
-                self._exec_task(message_handler['function'], message)
+        for _, message_handler, test in self._get_handler_index(handlers).candidates(message):
+            if test(message):
+                if message_handler.get('executor') == 'process':
+                    self._exec_process_task(message_handler, message)
+
+                else:
+                    self._exec_task(message_handler['function'], message)
 
                 break
 
+    def _get_handler_index(self, handlers):
+        """
+        Returns the dispatch table of a handler list, rebuilding it after handlers were added.
+
+        :param handlers:
+        :return: HandlerIndex
+        """
+
+        index = self._handler_indexes.get(id(handlers))
+
+        if index is None or index.is_stale(handlers):
+            index = self._handler_indexes[id(handlers)] = HandlerIndex(handlers)
+
+        return index
+
 
 class AsyncTeleBot(TeleBot):
+    """
+    TeleBot whose API methods are coroutines.
+
+    Requests go through asyncio_helper, which keeps one aiohttp keep-alive connection pool per event loop,
+    so any number of calls can be in flight without spawning threads.
+    Call `await bot.close_session()` before the event loop is closed.
+    Handlers run as tasks on the event loop, so no worker thread pool is started.
+    """
+
+    _uses_worker_pool = False
+
     def __init__(self, *args, **kwargs):
         TeleBot.__init__(self, *args, **kwargs)
 
-    @util.async_dec()
-    def log_out(self):
-        return TeleBot.get_me(self)
+        self.handler_tasks = set()
+        self.polling_stopped = None
+        self.polling_loop = None
 
-    @util.async_dec()
-    def close(self):
-        return TeleBot.close(self)
+    async def close_session(self):
+        await asyncio_helper.close_session()
 
-    @util.async_dec()
-    def get_me(self):
-        return TeleBot.get_me(self)
+    async def get_updates(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_updates, self, *args, **kwargs)
+
+    async def set_webhook(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_webhook, self, *args, **kwargs)
+
+    async def remove_webhook(self):
+        return await self.set_webhook()
+
+    async def delete_webhook(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.delete_webhook, self, *args, **kwargs)
+
+    async def get_webhook_info(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_webhook_info, self, *args, **kwargs)
+
+    async def polling(self, none_stop=False, interval=0, timeout=20):
+        """
+        Polls for updates on the running event loop and dispatches them to handlers, next step handlers and
+        middlewares, which may be coroutine functions. Each handler call runs as its own task, so any number of
+        them can wait on the API at the same time. Returns after `stop_polling`, once the running handlers finished.
+
+        :param none_stop: Do not stop polling when an ApiException or a connection error occurs.
+        :param timeout: Timeout in seconds for long polling.
+        """
+
+        logger.info('Started asyncio polling.')
+        self.polling_loop = asyncio.get_running_loop()
+        self.polling_stopped = asyncio.Event()
+        error_interval = 0.25
+
+        if self.skip_pending:
+            logger.debug('Skipped {0} pending messages'.format(await self.skip_updates()))
+
+            self.skip_pending = False
+
+        try:
+            while not self.polling_stopped.is_set():
+                fetch = asyncio.ensure_future(self.get_updates(offset=self.last_update_id + 1, timeout=timeout))
+                stopped = asyncio.ensure_future(self.polling_stopped.wait())
+
+                await asyncio.wait((fetch, stopped), return_when=asyncio.FIRST_COMPLETED)
+                stopped.cancel()
+
+                if not fetch.done():
+                    fetch.cancel()
+
+                    break
+
+                try:
+                    updates = fetch.result()
+                    error_interval = 0.25
+
+                except (apihelper.ApiException, asyncio_helper.aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(e)
+
+                    if not none_stop:
+                        logger.info("Exception occurred. Stopping.")
+
+                        break
+
+                    logger.info("Waiting for {0} seconds until retry".format(error_interval))
+                    await asyncio.sleep(error_interval)
+                    error_interval *= 2
+
+                    continue
+
+                await self.process_new_updates(updates)
+
+        finally:
+            if self.handler_tasks:
+                await asyncio.gather(*self.handler_tasks, return_exceptions=True)
+
+            self.polling_loop = None
+            logger.info('Stopped polling.')
+
+    async def infinity_polling(self, timeout=20, *args, **kwargs):
+        """
+        Polls with none_stop until `stop_polling`, restarting polling `timeout` seconds after an unexpected error.
+        """
+
+        while True:
+            try:
+                await self.polling(none_stop=True, timeout=timeout, *args, **kwargs)
+
+                break
+
+            except Exception:
+                logger.exception("Polling failed, restarting in {0} seconds".format(timeout))
+                await asyncio.sleep(timeout)
+
+        logger.info("Break infinity polling")
+
+    async def skip_updates(self):
+        """
+        Gets and discards all pending updates
+
+        :return: total updates skipped
+        """
+
+        total = 0
+        updates = await self.get_updates(offset=self.last_update_id, timeout=1)
+
+        while updates:
+            total += len(updates)
+            self.last_update_id = max(self.last_update_id, updates[-1].update_id)
+            updates = await self.get_updates(offset=self.last_update_id + 1, timeout=1)
+
+        return total
+
+    def stop_polling(self):
+        TeleBot.stop_polling(self)
+
+        if self.polling_loop is not None:
+            self.polling_loop.call_soon_threadsafe(self.polling_stopped.set)
+
+    async def process_new_updates(self, updates):
+        """
+        Dispatches a batch of updates like TeleBot.process_new_updates, awaiting coroutine middlewares.
+        Handlers are started as tasks and not awaited.
+
+        :param updates: list of Update
+        """
+
+        new_messages = []
+
+        for update in updates:
+            try:
+                await self._dispatch_update(update, new_messages)
+
+            except Exception:
+                if not getattr(util.thread_local, 'isolate_update_errors', False):
+                    raise
+
+                logger.exception("Exception while dispatching update {0}".format(update.update_id))
+
+        logger.debug('Received {0} new updates'.format(len(updates)))
+
+        if new_messages:
+            for listener in self.update_listener:
+                self._exec_task(listener, new_messages)
+
+    async def _dispatch_update(self, update, new_messages):
+        if update.update_id > self.last_update_id:
+            self.last_update_id = update.update_id
+
+        for middleware in self.default_middleware_handlers:
+            await self._maybe_await(middleware(self, update))
+
+        for update_type, handlers in self._update_handlers:
+            obj = getattr(update, update_type)
+
+            if obj is None:
+                continue
+
+            for middleware in self.typed_middleware_handlers.get(update_type, ()):
+                await self._maybe_await(middleware(self, obj))
+
+            if update_type == 'message':
+                new_messages.append(obj)
+                self._process_new_message(obj)
+
+            else:
+                self._notify_command_handlers(handlers, obj)
+
+            return
+
+    @staticmethod
+    async def _maybe_await(result):
+        if inspect.isawaitable(result):
+            return await result
+
+        return result
+
+    def _exec_task(self, task, *args, **kwargs):
+        """
+        Calls `task`. When it returns an awaitable (coroutine functions), it is run as a task on the running loop.
+        """
+
+        try:
+            result = task(*args, **kwargs)
+
+        except Exception:
+            logger.exception("Exception in handler {0}".format(getattr(task, '__name__', task)))
+
+            return
+
+        if inspect.isawaitable(result):
+            handler_task = asyncio.ensure_future(result)
+            self.handler_tasks.add(handler_task)
+            handler_task.add_done_callback(self._on_handler_done)
+
+    def _exec_process_task(self, handler_dict, obj):
+        """
+        Like TeleBot._exec_process_task, but the `on_result` callback is run on this event loop
+        rather than on the thread that completes the process pool's futures.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = self._submit_process_task(handler_dict, obj)
+        future.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self._on_process_result, handler_dict, obj, f)
+        )
+
+    def _on_handler_done(self, handler_task):
+        self.handler_tasks.discard(handler_task)
+
+        if not handler_task.cancelled() and handler_task.exception() is not None:
+            logger.error("Exception in handler", exc_info=handler_task.exception())
+
+    async def log_out(self):
+        return await asyncio_helper.run_method(TeleBot.log_out, self)
+
+    async def close(self):
+        return await asyncio_helper.run_method(TeleBot.close, self)
+
+    async def get_me(self):
+        return await asyncio_helper.run_method(TeleBot.get_me, self)
+
+    async def get_my_commands(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_my_commands, self, *args, **kwargs)
+
+    async def set_my_commands(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_my_commands, self, *args, **kwargs)
+
+    async def get_file(self, *args):
+        return await asyncio_helper.run_method(TeleBot.get_file, self, *args)
+
+    async def get_file_url(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_file_url, self, *args, **kwargs)
+
+    async def download_file(self, file_path):
+        return await asyncio_helper.download_file(self.token, file_path)
+
+    async def download_file_to(self, file_path, destination, chunk_size=None, resume=False):
+        return await asyncio_helper.download_file_to(self.token, file_path, destination, chunk_size, resume)
+
+    async def iter_download_file(self, file_path, chunk_size=None, offset=0):
+        async for chunk in asyncio_helper.iter_download_file(self.token, file_path, chunk_size, offset):
+            yield chunk
+
+    async def get_user_profile_photos(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_user_profile_photos, self, *args, **kwargs)
+
+    async def get_chat(self, *args):
+        return await asyncio_helper.run_method(TeleBot.get_chat, self, *args)
+
+    async def leave_chat(self, *args):
+        return await asyncio_helper.run_method(TeleBot.leave_chat, self, *args)
+
+    async def get_chat_administrators(self, *args):
+        return await asyncio_helper.run_method(TeleBot.get_chat_administrators, self, *args)
 
-    @util.async_dec()
-    def get_file(self, *args):
-        return TeleBot.get_file(self, *args)
+    async def get_chat_members_count(self, *args):
+        return await asyncio_helper.run_method(TeleBot.get_chat_members_count, self, *args)
 
-    @util.async_dec()
-    def download_file(self, *args):
-        return TeleBot.download_file(self, *args)
+    async def set_chat_sticker_set(self, *args):
+        return await asyncio_helper.run_method(TeleBot.set_chat_sticker_set, self, *args)
 
-    @util.async_dec()
-    def get_user_profile_photos(self, *args, **kwargs):
-        return TeleBot.get_user_profile_photos(self, *args, **kwargs)
+    async def delete_chat_sticker_set(self, *args):
+        return await asyncio_helper.run_method(TeleBot.delete_chat_sticker_set, self, *args)
 
-    @util.async_dec()
-    def get_chat(self, *args):
-        return TeleBot.get_chat(self, *args)
+    async def get_chat_member(self, *args):
+        return await asyncio_helper.run_method(TeleBot.get_chat_member, self, *args)
 
-    @util.async_dec()
-    def leave_chat(self, *args):
-        return TeleBot.leave_chat(self, *args)
+    async def send_message(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_message, self, *args, **kwargs)
 
-    @util.async_dec()
-    def get_chat_administrators(self, *args):
-        return TeleBot.get_chat_administrators(self, *args)
+    async def reply_to(self, message, text, **kwargs):
+        return await self.send_message(message.chat.id, text, reply_to_message_id=message.message_id, **kwargs)
 
-    @util.async_dec()
-    def get_chat_members_count(self, *args):
-        return TeleBot.get_chat_members_count(self, *args)
+    async def send_dice(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_dice, self, *args, **kwargs)
 
-    @util.async_dec()
-    def set_chat_sticker_set(self, *args):
-        return TeleBot.set_chat_sticker_set(self, *args)
+    async def forward_message(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.forward_message, self, *args, **kwargs)
 
-    @util.async_dec()
-    def delete_chat_sticker_set(self, *args):
-        return TeleBot.delete_chat_sticker_set(self, *args)
+    async def copy_message(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.copy_message, self, *args, **kwargs)
 
-    @util.async_dec()
-    def get_chat_member(self, *args):
-        return TeleBot.get_chat_member(self, *args)
+    async def delete_message(self, *args):
+        return await asyncio_helper.run_method(TeleBot.delete_message, self, *args)
 
-    @util.async_dec()
-    def send_message(self, *args, **kwargs):
-        return TeleBot.send_message(self, *args, **kwargs)
+    async def send_photo(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_photo, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_dice(self, *args, **kwargs):
-        return TeleBot.send_dice(self, *args, **kwargs)
+    async def send_audio(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_audio, self, *args, **kwargs)
 
-    @util.async_dec()
-    def forward_message(self, *args, **kwargs):
-        return TeleBot.forward_message(self, *args, **kwargs)
+    async def send_voice(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_voice, self, *args, **kwargs)
 
-    @util.async_dec()
-    def delete_message(self, *args):
-        return TeleBot.delete_message(self, *args)
+    async def send_document(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_document, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_photo(self, *args, **kwargs):
-        return TeleBot.send_photo(self, *args, **kwargs)
+    async def send_sticker(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_sticker, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_audio(self, *args, **kwargs):
-        return TeleBot.send_audio(self, *args, **kwargs)
+    async def send_video(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_video, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_voice(self, *args, **kwargs):
-        return TeleBot.send_voice(self, *args, **kwargs)
+    async def send_animation(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_animation, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_document(self, *args, **kwargs):
-        return TeleBot.send_document(self, *args, **kwargs)
+    async def send_video_note(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_video_note, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_sticker(self, *args, **kwargs):
-        return TeleBot.send_sticker(self, *args, **kwargs)
+    async def send_media_group(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_media_group, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_video(self, *args, **kwargs):
-        return TeleBot.send_video(self, *args, **kwargs)
+    async def send_location(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_location, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_video_note(self, *args, **kwargs):
-        return TeleBot.send_video_note(self, *args, **kwargs)
+    async def edit_message_live_location(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.edit_message_live_location, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_media_group(self, *args, **kwargs):
-        return TeleBot.send_media_group(self, *args, **kwargs)
+    async def stop_message_live_location(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.stop_message_live_location, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_location(self, *args, **kwargs):
-        return TeleBot.send_location(self, *args, **kwargs)
+    async def send_venue(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_venue, self, *args, **kwargs)
 
-    @util.async_dec()
-    def edit_message_live_location(self, *args, **kwargs):
-        return TeleBot.edit_message_live_location(self, *args, **kwargs)
+    async def send_contact(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_contact, self, *args, **kwargs)
 
-    @util.async_dec()
-    def stop_message_live_location(self, *args, **kwargs):
-        return TeleBot.stop_message_live_location(self, *args, **kwargs)
+    async def send_chat_action(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_chat_action, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_venue(self, *args, **kwargs):
-        return TeleBot.send_venue(self, *args, **kwargs)
+    async def kick_chat_member(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.kick_chat_member, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_contact(self, *args, **kwargs):
-        return TeleBot.send_contact(self, *args, **kwargs)
+    async def unban_chat_member(self, *args):
+        return await asyncio_helper.run_method(TeleBot.unban_chat_member, self, *args)
 
-    @util.async_dec()
-    def send_chat_action(self, *args, **kwargs):
-        return TeleBot.send_chat_action(self, *args, **kwargs)
+    async def restrict_chat_member(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.restrict_chat_member, self, *args, **kwargs)
 
-    @util.async_dec()
-    def kick_chat_member(self, *args, **kwargs):
-        return TeleBot.kick_chat_member(self, *args, **kwargs)
+    async def promote_chat_member(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.promote_chat_member, self, *args, **kwargs)
 
-    @util.async_dec()
-    def unban_chat_member(self, *args):
-        return TeleBot.unban_chat_member(self, *args)
+    async def set_chat_administrator_custom_title(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_chat_administrator_custom_title, self, *args, **kwargs)
 
-    @util.async_dec()
-    def restrict_chat_member(self, *args, **kwargs):
-        return TeleBot.restrict_chat_member(self, *args, **kwargs)
+    async def set_chat_permissions(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_chat_permissions, self, *args, **kwargs)
 
-    @util.async_dec()
-    def promote_chat_member(self, *args, **kwargs):
-        return TeleBot.promote_chat_member(self, *args, **kwargs)
+    async def export_chat_invite_link(self, *args):
+        return await asyncio_helper.run_method(TeleBot.export_chat_invite_link, self, *args)
 
-    @util.async_dec()
-    def export_chat_invite_link(self, *args):
-        return TeleBot.export_chat_invite_link(self, *args)
+    async def set_chat_photo(self, *args):
+        return await asyncio_helper.run_method(TeleBot.set_chat_photo, self, *args)
 
-    @util.async_dec()
-    def set_chat_photo(self, *args):
-        return TeleBot.set_chat_photo(self, *args)
+    async def delete_chat_photo(self, *args):
+        return await asyncio_helper.run_method(TeleBot.delete_chat_photo, self, *args)
 
-    @util.async_dec()
-    def delete_chat_photo(self, *args):
-        return TeleBot.delete_chat_photo(self, *args)
+    async def set_chat_title(self, *args):
+        return await asyncio_helper.run_method(TeleBot.set_chat_title, self, *args)
 
-    @util.async_dec()
-    def set_chat_title(self, *args):
-        return TeleBot.set_chat_title(self, *args)
+    async def set_chat_description(self, *args):
+        return await asyncio_helper.run_method(TeleBot.set_chat_description, self, *args)
 
-    @util.async_dec()
-    def set_chat_description(self, *args):
-        return TeleBot.set_chat_description(self, *args)
+    async def pin_chat_message(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.pin_chat_message, self, *args, **kwargs)
 
-    @util.async_dec()
-    def pin_chat_message(self, *args, **kwargs):
-        return TeleBot.pin_chat_message(self, *args, **kwargs)
+    async def unpin_chat_message(self, *args):
+        return await asyncio_helper.run_method(TeleBot.unpin_chat_message, self, *args)
 
-    @util.async_dec()
-    def unpin_chat_message(self, *args):
-        return TeleBot.unpin_chat_message(self, *args)
+    async def unpin_all_chat_messages(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.unpin_all_chat_messages, self, *args, **kwargs)
 
-    @util.async_dec()
-    def edit_message_text(self, *args, **kwargs):
-        return TeleBot.edit_message_text(self, *args, **kwargs)
+    async def edit_message_text(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.edit_message_text, self, *args, **kwargs)
 
-    @util.async_dec()
-    def edit_message_media(self, *args, **kwargs):
-        return TeleBot.edit_message_media(self, *args, **kwargs)
+    async def edit_message_media(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.edit_message_media, self, *args, **kwargs)
 
-    @util.async_dec()
-    def edit_message_reply_markup(self, *args, **kwargs):
-        return TeleBot.edit_message_reply_markup(self, *args, **kwargs)
+    async def edit_message_reply_markup(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.edit_message_reply_markup, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_game(self, *args, **kwargs):
-        return TeleBot.send_game(self, *args, **kwargs)
+    async def send_game(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_game, self, *args, **kwargs)
 
-    @util.async_dec()
-    def set_game_score(self, *args, **kwargs):
-        return TeleBot.set_game_score(self, *args, **kwargs)
+    async def set_game_score(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_game_score, self, *args, **kwargs)
 
-    @util.async_dec()
-    def get_game_high_scores(self, *args, **kwargs):
-        return TeleBot.get_game_high_scores(self, *args, **kwargs)
+    async def get_game_high_scores(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_game_high_scores, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_invoice(self, *args, **kwargs):
-        return TeleBot.send_invoice(self, *args, **kwargs)
+    async def send_invoice(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_invoice, self, *args, **kwargs)
 
-    @util.async_dec()
-    def answer_shipping_query(self, *args, **kwargs):
-        return TeleBot.answer_shipping_query(self, *args, **kwargs)
+    async def answer_shipping_query(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.answer_shipping_query, self, *args, **kwargs)
 
-    @util.async_dec()
-    def answer_pre_checkout_query(self, *args, **kwargs):
-        return TeleBot.answer_pre_checkout_query(self, *args, **kwargs)
+    async def answer_pre_checkout_query(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.answer_pre_checkout_query, self, *args, **kwargs)
 
-    @util.async_dec()
-    def edit_message_caption(self, *args, **kwargs):
-        return TeleBot.edit_message_caption(self, *args, **kwargs)
+    async def edit_message_caption(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.edit_message_caption, self, *args, **kwargs)
 
-    @util.async_dec()
-    def answer_inline_query(self, *args, **kwargs):
-        return TeleBot.answer_inline_query(self, *args, **kwargs)
+    async def answer_inline_query(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.answer_inline_query, self, *args, **kwargs)
 
-    @util.async_dec()
-    def answer_callback_query(self, *args, **kwargs):
-        return TeleBot.answer_callback_query(self, *args, **kwargs)
+    async def answer_callback_query(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.answer_callback_query, self, *args, **kwargs)
 
-    @util.async_dec()
-    def get_sticker_set(self, *args, **kwargs):
-        return TeleBot.get_sticker_set(self, *args, **kwargs)
+    async def get_sticker_set(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.get_sticker_set, self, *args, **kwargs)
 
-    @util.async_dec()
-    def upload_sticker_file(self, *args, **kwargs):
-        return TeleBot.upload_sticker_file(self, *args, **kwargs)
+    async def upload_sticker_file(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.upload_sticker_file, self, *args, **kwargs)
 
-    @util.async_dec()
-    def create_new_sticker_set(self, *args, **kwargs):
-        return TeleBot.create_new_sticker_set(self, *args, **kwargs)
+    async def create_new_sticker_set(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.create_new_sticker_set, self, *args, **kwargs)
 
-    @util.async_dec()
-    def add_sticker_to_set(self, *args, **kwargs):
-        return TeleBot.add_sticker_to_set(self, *args, **kwargs)
+    async def add_sticker_to_set(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.add_sticker_to_set, self, *args, **kwargs)
 
-    @util.async_dec()
-    def set_sticker_position_in_set(self, *args, **kwargs):
-        return TeleBot.set_sticker_position_in_set(self, *args, **kwargs)
+    async def set_sticker_position_in_set(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.set_sticker_position_in_set, self, *args, **kwargs)
 
-    @util.async_dec()
-    def delete_sticker_from_set(self, *args, **kwargs):
-        return TeleBot.delete_sticker_from_set(self, *args, **kwargs)
+    async def delete_sticker_from_set(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.delete_sticker_from_set, self, *args, **kwargs)
 
-    @util.async_dec()
-    def send_poll(self, *args, **kwargs):
-        return TeleBot.send_poll(self, *args, **kwargs)
+    async def send_poll(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.send_poll, self, *args, **kwargs)
 
-    @util.async_dec()
-    def stop_poll(self, *args, **kwargs):
-        return TeleBot.stop_poll(self, *args, **kwargs)
+    async def stop_poll(self, *args, **kwargs):
+        return await asyncio_helper.run_method(TeleBot.stop_poll, self, *args, **kwargs)
@@ -1,18 +1,23 @@
 # -*- coding: utf-8 -*-
 
 
+import io
+import os
 import time
-import json
+import socket
+import threading
 
 import requests
+from requests.adapters import HTTPAdapter
 from urllib3 import fields
+from urllib3.connection import HTTPConnection
 from requests.exceptions import HTTPError, ConnectionError, ProxyError, Timeout, ConnectTimeout
 
 import telebot
 from telebot import types
 from telebot import util
 from telebot import exceptions
-from exceptions import HTTPStatus
+from http import HTTPStatus
 
 import logging
 
@@ -36,9 +41,92 @@ RETRY_ON_ERROR = None
 
 CUSTOM_SERIALIZER = None
 
+JSON_CODEC = util.default_json_codec()
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+POOL_BLOCK = False
+KEEPALIVE_IDLE = 60
+
+RATE_LIMITER = None
+
+BODY_MODE = None
+
+RETRY_ON_FLOOD_WAIT = False
+MAX_FLOOD_RETRIES = 3
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+STREAM_UPLOADS = True
+
+_flood_holds = {}  # str(chat_id): time.monotonic() until which requests to that chat wait after a 429
+_global_flood_hold = 0.0  # time.monotonic() until which every request waits after a 429 of a request without a chat
+_flood_holds_lock = threading.Lock()
+
+_shared_session = None
+_session_lock = threading.Lock()
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that enables TCP keep-alive probes on pooled connections,
+    so idle connections are not silently dropped by NATs and proxies between polls.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', _keepalive_socket_options())
+
+        super(_KeepAliveAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def _keepalive_socket_options():
+    options = list(HTTPConnection.default_socket_options)
+
+    if KEEPALIVE_IDLE:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE))
+
+        if hasattr(socket, 'TCP_KEEPINTVL'):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, KEEPALIVE_IDLE // 4)))
+
+    return options
+
+
+def _create_req_session():
+    new_session = requests.session()
+    adapter = _KeepAliveAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK
+    )
+
+    new_session.mount('https://', adapter)
+    new_session.mount('http://', adapter)
+
+    return new_session
+
 
 def _get_req_session(reset=False):
-    return util.per_thread('req_session', lambda: session if session else requests.session(), reset)
+    """
+    Returns the session shared by all threads, so worker threads reuse the same warm connections.
+    The pool is sized by POOL_CONNECTIONS/POOL_MAXSIZE; with POOL_BLOCK threads wait for a free
+    connection instead of opening extra ones. A custom `session` takes precedence.
+    """
+
+    global _shared_session
+
+    if session:
+        return session
+
+    if reset or _shared_session is None:
+        with _session_lock:
+            if reset or _shared_session is None:
+                if _shared_session is not None:
+                    _shared_session.close()
+
+                _shared_session = _create_req_session()
+
+    return _shared_session
 
 
 def _make_request(token, method_name, method='get', params=None, files=None):
@@ -53,21 +141,52 @@ def _make_request(token, method_name, method='get', params=None, files=None):
     :return: The result parsed to a JSON dictionary.
     """
 
+    interceptor = getattr(util.thread_local, 'request_interceptor', None)
+
+    if interceptor is not None:
+        return interceptor(token, method_name, method, params, files)
+
+    if not RETRY_ON_FLOOD_WAIT:
+        return _send_request(token, method_name, method, params, files)
+
+    chat_id = _get_chat_id(params)
+    offsets = _file_offsets(files)
+    current_try = 0
+
+    while True:
+        hold = _flood_hold_delay(chat_id)
+
+        if hold > 0:
+            time.sleep(hold)
+
+        try:
+            return _send_request(token, method_name, method, _copy_params(params), _rewind_files(files, offsets))
+
+        except exceptions.RetryAfter as e:
+            current_try += 1
+
+            if current_try > MAX_FLOOD_RETRIES:
+                raise
+
+            logger.warning(f"Flood control on {method_name} for chat {chat_id}, retrying in {e.retry_after}s")
+            _set_flood_hold(chat_id, e.retry_after)
+
+
+def _send_request(token, method_name, method, params, files):
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.acquire(method_name, params)
+
     request_url = f"{BASE_URL}{token}/{method_name}"
 
-    logger.debug("Request: method={0} url={1} params={2} files={3}".format(method, request_url, params, files))
-    read_timeout = READ_TIMEOUT
-    connect_timeout = CONNECT_TIMEOUT
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request: method={0} url={1} params={2} files={3}".format(method, request_url, params, files))
+
+    connect_timeout, read_timeout = _pop_timeouts(params)
 
     if files and format_header_param:
         fields.format_header_param = _no_encode(format_header_param)
 
-    if params:
-        if 'timeout' in params:
-            read_timeout = params.pop('timeout') + 10
-
-        if 'connect-timeout' in params:
-            connect_timeout = params.pop('connect-timeout') + 10
+    method, request_kwargs = _build_request(method, params, files)
 
     if RETRY_ON_ERROR:
         got_result = False
@@ -78,8 +197,8 @@ def _make_request(token, method_name, method='get', params=None, files=None):
 
             try:
                 result = _get_req_session().request(
-                    method, request_url, params=params, files=files,
-                    timeout=(connect_timeout, read_timeout), proxies=proxy
+                    method, request_url, timeout=(connect_timeout, read_timeout),
+                    proxies=proxy, **request_kwargs
                 )
 
                 got_result = True
@@ -103,15 +222,15 @@ def _make_request(token, method_name, method='get', params=None, files=None):
 
         if not got_result:
             result = _get_req_session().request(
-                method, request_url, params=params, files=files,
-                timeout=(connect_timeout, read_timeout), proxies=proxy
+                method, request_url, timeout=(connect_timeout, read_timeout),
+                proxies=proxy, **request_kwargs
             )
 
     else:
         try:
             result = _get_req_session().request(
-                method, request_url, params=params, files=files,
-                timeout=(connect_timeout, read_timeout), proxies=proxy
+                method, request_url, timeout=(connect_timeout, read_timeout),
+                proxies=proxy, **request_kwargs
             )
 
         except HTTPError:
@@ -119,12 +238,327 @@ def _make_request(token, method_name, method='get', params=None, files=None):
 
         #except ConnectionError:
 
-    logger.debug("The server returned: '{0}'".format(result.text.encode('utf8')))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("The server returned: '{0}'".format(result.text.encode('utf8')))
+
+    return _check_result(method_name, result)
+
+
+def _json_body(params):
+    """
+    Serializes `params` for an application/json body, or returns None if they hold raw bytes.
+    """
+
+    if any(isinstance(value, bytes) for value in params.values()):
+        return None
+
+    return JSON_CODEC.dumps(params)
+
+
+def _build_request(method, params, files):
+    """
+    Chooses where the payload goes according to BODY_MODE.
+    None keeps it in the URL query string; 'form' and 'json' send it as a POST body
+    ('json' falls back to a form body when files or raw bytes are sent).
+
+    :return: (method, keyword arguments for Session.request) tuple.
+    """
+
+    if BODY_MODE is None or not params:
+        if files:
+            return method, dict(_multipart_kwargs(None, files), params=params)
+
+        return method, {'params': params, 'files': files}
+
+    if BODY_MODE == 'json' and not files:
+        body = _json_body(params)
+
+        if body is not None:
+            return 'post', {'data': body.encode('utf-8'), 'headers': {'Content-Type': 'application/json'}}
+
+    if files:
+        return 'post', _multipart_kwargs(params, files)
+
+    return 'post', {'data': params, 'files': files}
+
+
+def _multipart_kwargs(fields, files):
+    """
+    Streams `fields` and `files` as a _MultipartStream if STREAM_UPLOADS is set and every file's size is known,
+    otherwise leaves the multipart body to requests, which builds it in memory.
+
+    :return: keyword arguments for Session.request
+    """
+
+    body = _MultipartStream.create(fields, files) if STREAM_UPLOADS else None
+
+    if body is None:
+        return {'data': fields, 'files': files}
+
+    return {'data': body, 'headers': {'Content-Type': body.content_type}}
+
+
+class _MultipartStream:
+    """
+    multipart/form-data request body that is sent as it is read instead of being built in memory.
+    File objects are read UPLOAD_CHUNK_SIZE bytes at a time from their current position, bytes-like values are
+    sent as they are. The body has a length, so requests sends a Content-Length header rather than chunking it,
+    and every iteration starts it over, so a retried request sends the whole body again.
+    """
+
+    def __init__(self, parts, boundary=None):
+        self.boundary = boundary or os.urandom(16).hex()
+        self.content_type = 'multipart/form-data; boundary={0}'.format(self.boundary)
+        self.parts = []
+        self.length = 0
+
+        for name, filename, source, size, headers in parts:
+            disposition = 'form-data; name="{0}"'.format(self._quote(name))
+
+            if filename is not None:
+                disposition += '; filename="{0}"'.format(self._quote(filename))
+
+            header = '--{0}\r\nContent-Disposition: {1}\r\n'.format(self.boundary, disposition)
+
+            for key, value in (headers or {}).items():
+                if value is not None:
+                    header += '{0}: {1}\r\n'.format(key, value)
+
+            header = (header + '\r\n').encode('utf-8')
+            self.parts.append((header, source, size))
+            self.length += len(header) + size + 2
+
+        self.tail = '--{0}--\r\n'.format(self.boundary).encode('utf-8')
+        self.length += len(self.tail)
+
+    @classmethod
+    def create(cls, fields, files):
+        """
+        Builds the body from form fields and a requests-style `files` dict.
+
+        :return: _MultipartStream, or None if the size of a file can not be determined
+        """
+
+        parts = []
+
+        for name, values in (fields or {}).items():
+            if util.is_string(values) or not hasattr(values, '__iter__'):
+                values = [values]
+
+            for value in values:
+                if value is not None:
+                    if not isinstance(value, bytes):
+                        value = str(value).encode('utf-8')
+
+                    parts.append((name, None, memoryview(value), len(value), None))
+
+        for name, value in files.items():
+            filename = content_type = headers = None
+
+            if isinstance(value, tuple):
+                if len(value) == 2:
+                    filename, value = value
+
+                elif len(value) == 3:
+                    filename, value, content_type = value
+
+                else:
+                    filename, value, content_type, headers = value
+
+            elif util.is_string(getattr(value, 'name', None)) and not value.name.startswith('<'):
+                filename = os.path.basename(value.name)
+
+            if value is None:
+                continue
+
+            source = cls._source(value)
+
+            if source is None:
+                return None
+
+            headers = dict(headers or {}, **{'Content-Type': content_type}) if content_type else headers
+            parts.append((name, filename or name, source[0], source[1], headers))
+
+        return cls(parts)
+
+    @staticmethod
+    def _source(value):
+        """
+        :return: (source, size) tuple, where `source` is a memoryview or a (file object, start position) tuple,
+            or None if `value` can not be streamed
+        """
+
+        if util.is_string(value):
+            value = value.encode('utf-8')
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = memoryview(value).cast('B')
+
+            return value, value.nbytes
+
+        if isinstance(value, io.TextIOBase) or not hasattr(value, 'read'):
+            return None
+
+        try:
+            start = value.tell()
+
+            try:
+                end = os.fstat(value.fileno()).st_size
+
+            except (AttributeError, OSError):
+                end = value.seek(0, os.SEEK_END)
+                value.seek(start)
+
+        except (AttributeError, OSError):
+            return None
+
+        return (value, start), max(end - start, 0)
+
+    @staticmethod
+    def _quote(value):
+        # Non-ASCII names are sent as UTF-8, as Telegram expects (see _no_encode).
+        return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for header, source, size in self.parts:
+            yield header
 
-    json_result = _check_result(method_name, result)
+            if isinstance(source, memoryview):
+                yield source
 
-    if json_result:
-        return json_result['result']
+            else:
+                fileobj, start = source
+                fileobj.seek(start)
+                remaining = size
+
+                while remaining > 0:
+                    chunk = fileobj.read(min(UPLOAD_CHUNK_SIZE, remaining))
+
+                    if not chunk:
+                        raise IOError("File ended {0} bytes before its size when it was sent".format(remaining))
+
+                    remaining -= len(chunk)
+
+                    yield chunk
+
+            yield b'\r\n'
+
+        yield self.tail
+
+
+def _get_chat_id(params):
+    """
+    Returns the chat of a request as a string, as API methods pass it either as a string or as an int.
+    """
+
+    chat_id = params.get('chat_id') if params else None
+
+    return None if chat_id is None else str(chat_id)
+
+
+def _copy_params(params):
+    return dict(params) if params else params
+
+
+def _file_offsets(files):
+    """
+    Records where each file object of `files` is positioned, for `_rewind_files`.
+    """
+
+    offsets = {}
+
+    if files:
+        for key, value in files.items():
+            if isinstance(value, tuple):
+                value = value[1]
+
+            try:
+                offsets[key] = value.tell()
+
+            except (AttributeError, OSError, ValueError):
+                pass  # not seekable: a retry sends what is left
+
+    return offsets
+
+
+def _rewind_files(files, offsets):
+    """
+    Seeks file objects back to the positions recorded by `_file_offsets`,
+    so a retried upload sends the same bytes as the first attempt.
+    """
+
+    for key, offset in offsets.items():
+        value = files[key]
+
+        if isinstance(value, tuple):
+            value = value[1]
+
+        value.seek(offset)
+
+    return files
+
+
+def _flood_hold_delay(chat_id):
+    """
+    Returns how many seconds a request to `chat_id` (None for requests without a chat) must still wait
+    after a 429 response for that chat or for a request without a chat.
+    """
+
+    now = time.monotonic()
+    delay = max(_global_flood_hold - now, 0)
+    until = _flood_holds.get(chat_id) if chat_id is not None else None
+
+    if until is None:
+        return delay
+
+    if until <= now:
+        with _flood_holds_lock:
+            if _flood_holds.get(chat_id) == until:
+                del _flood_holds[chat_id]
+
+    return max(delay, until - now)
+
+
+def _set_flood_hold(chat_id, retry_after):
+    """
+    Holds requests to `chat_id` for `retry_after` seconds. A 429 for a request without a chat
+    can not be attributed to one, so it holds every request.
+    """
+
+    global _global_flood_hold
+
+    until = time.monotonic() + retry_after
+
+    with _flood_holds_lock:
+        if chat_id is None:
+            _global_flood_hold = max(_global_flood_hold, until)
+
+        elif _flood_holds.get(chat_id, 0) < until:
+            _flood_holds[chat_id] = until
+
+
+def _pop_timeouts(params):
+    """
+    Extracts the `timeout` and `connect-timeout` pseudo-parameters from `params`.
+
+    :param params: Request parameters, modified in place.
+    :return: (connect_timeout, read_timeout) tuple.
+    """
+
+    read_timeout = READ_TIMEOUT
+    connect_timeout = CONNECT_TIMEOUT
+
+    if params:
+        if 'timeout' in params:
+            read_timeout = params.pop('timeout') + 10
+
+        if 'connect-timeout' in params:
+            connect_timeout = params.pop('connect-timeout') + 10
+
+    return connect_timeout, read_timeout
 
 
 def _check_result(method_name, result):
@@ -141,9 +575,24 @@ def _check_result(method_name, result):
     :return: The result parsed to a JSON dictionary.
     """
 
-    print(result.json())
+    try:
+        result_json = JSON_CODEC.loads(result.content)
+
+    except ValueError:
+        raise ApiInvalidJSONException(method_name, result)
+
+    return _check_result_json(method_name, result.status_code, result_json)
+
+
+def _check_result_json(method_name, status_code, result_json):
+    """
+    Checks an already decoded API response. Shared by the blocking and the asyncio transports.
 
-    result_json = result.json()
+    :param method_name: The name of the method called
+    :param status_code: HTTP status code of the response
+    :param result_json: The decoded response body
+    :return: The `result` field of the response.
+    """
 
     description = result_json.get('description')
 
@@ -152,12 +601,10 @@ def _check_result(method_name, result):
     else:
         parameters = {}
 
-    status_code = result.status_code
-
     if result_json['ok'] == True:
         return result_json.get('result')
     elif parameters.get('retry_after'):
-        raise exceptions.RetryAfter(result_json.get('retry_after'))
+        raise exceptions.RetryAfter(parameters['retry_after'], result_json)
     elif parameters.get('migrate_to_chat_id'):
         raise exceptions.MigrateToChat(parameters['migrate_to_chat_id'])
     elif status_code == HTTPStatus.BAD_REQUEST:
@@ -192,21 +639,20 @@ def get_file(token, file_id):
     method_url = 'getFile'
     return _make_request(token, method_url, params={'file_id': file_id})
 
-def get_file_url(token, file_id):
+def _file_url(token, file_path):
     if FILE_URL is None:
-        return f"{BASE_URL}{token}/{get_file(token, file_id)['file_path']}"
+        return f"https://api.telegram.org/file/bot{token}/{file_path}"
 
     else:
-        return FILE_URL.format(token, get_file(token, file_id)['file_path'])
+        return FILE_URL.format(token, file_path)
 
-def download_file(token, file_path):
-    if FILE_URL is None:
-        url =  "{BASE_URL}{token}/{}".format(file_path)
 
-    else:
-        url =  FILE_URL.format(token, file_path)
+def get_file_url(token, file_id):
+    return _file_url(token, get_file(token, file_id)['file_path'])
+
 
-    result = _get_req_session().get(url, proxies=proxy)
+def download_file(token, file_path):
+    result = _get_req_session().get(_file_url(token, file_path), proxies=proxy)
 
     if result.status_code != 200:
         raise ApiHTTPException('Download file', result)
@@ -214,6 +660,103 @@ def download_file(token, file_path):
     return result.content
 
 
+def iter_download_file(token, file_path, chunk_size=None, offset=0):
+    """
+    Streams a file from the Telegram servers without buffering it.
+    A transfer that breaks off, or a reconnection that fails or times out, is retried with a Range request
+    from the last byte received, up to MAX_RETRIES times.
+
+    :param token: The bot's API token. (Created with @BotFather)
+    :param file_path: file_path of a File returned by get_file
+    :param chunk_size: bytes per chunk, defaults to DOWNLOAD_CHUNK_SIZE
+    :param offset: byte to start at
+    :return: generator of bytes chunks
+    """
+
+    url = _file_url(token, file_path)
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    current_try = 0
+
+    while True:
+        headers = {'Range': f"bytes={offset}-"} if offset else None
+        result = None
+
+        try:
+            result = _get_req_session().get(
+                url, headers=headers, stream=True, proxies=proxy, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+
+            if result.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                return  # `offset` is the end of the file
+
+            if result.status_code not in (HTTPStatus.OK, HTTPStatus.PARTIAL_CONTENT):
+                raise ApiHTTPException('Download file', result)
+
+            # A server that ignores Range sends the whole file again.
+            skip = offset if result.status_code == HTTPStatus.OK else 0
+
+            for chunk in result.iter_content(chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+
+                    chunk = chunk[skip:]
+                    skip = 0
+
+                offset += len(chunk)
+
+                yield chunk
+
+            return
+
+        except (ConnectionError, Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            current_try += 1
+
+            if current_try > MAX_RETRIES:
+                raise
+
+            logger.warning(f"Download of {file_path} interrupted at byte {offset}, resuming: {e}")
+
+        finally:
+            if result is not None:
+                result.close()
+
+
+def download_file_to(token, file_path, destination, chunk_size=None, resume=False):
+    """
+    Streams a file from the Telegram servers to `destination`, holding at most one chunk in memory.
+
+    :param token: The bot's API token. (Created with @BotFather)
+    :param file_path: file_path of a File returned by get_file
+    :param destination: path or writable binary file object
+    :param chunk_size: bytes per chunk, defaults to DOWNLOAD_CHUNK_SIZE
+    :param resume: continue a partial download: after the existing bytes of a path,
+        or from the current position of a file object
+    :return: number of bytes written
+    """
+
+    if util.is_string(destination):
+        offset = os.path.getsize(destination) if resume and os.path.exists(destination) else 0
+
+        with open(destination, 'ab' if offset else 'wb') as fileobj:
+            return _write_chunks(iter_download_file(token, file_path, chunk_size, offset), fileobj)
+
+    offset = destination.tell() if resume else 0
+
+    return _write_chunks(iter_download_file(token, file_path, chunk_size, offset), destination)
+
+
+def _write_chunks(chunks, fileobj):
+    written = 0
+
+    for chunk in chunks:
+        fileobj.write(chunk)
+        written += len(chunk)
+
+    return written
+
+
 def send_message(
     token, chat_id, text, disable_web_page_preview=None,
     reply_to_message_id=None, allow_sending_without_reply=None, reply_markup=None,
@@ -313,7 +856,7 @@ def set_webhook(
         payload['max_connections'] = max_connections
 
     if allowed_updates:
-        payload['allowed_updates'] = json.dumps(allowed_updates)
+        payload['allowed_updates'] = JSON_CODEC.dumps(allowed_updates)
 
     if drop_pending_updates:
         payload['drop_pending_updates'] = drop_pending_updates
@@ -353,7 +896,7 @@ def get_updates(token, offset=None, limit=None, timeout=None, allowed_updates=No
         payload['timeout'] = timeout
 
     if allowed_updates:
-        payload['allowed_updates'] = json.dumps(allowed_updates)
+        payload['allowed_updates'] = JSON_CODEC.dumps(allowed_updates)
 
     return _make_request(token, method_url, params=payload)
 
@@ -469,10 +1012,10 @@ def send_photo(
     payload = {'chat_id': chat_id}
     files = None
 
-    if util.is_pil_image(photo):
-        payload['photo'] = util.pil_image_to_bytes(photo)
-    elif util.is_bytes(photo):
+    if util.is_string(photo):
         payload['photo'] = photo
+    elif util.is_pil_image(photo):
+        files = {'photo': util.pil_image_to_buffer(photo)}
     else:
         files = {'photo': photo}
 
@@ -1064,7 +1607,7 @@ def set_chat_photo(token, chat_id, photo):
         payload['photo'] = photo
 
     elif util.is_pil_image(photo):
-        files = {'photo': util.pil_image_to_bytes(photo)}
+        files = {'photo': util.pil_image_to_buffer(photo)}
 
     else:
         files = {'photo': photo}
@@ -1597,7 +2140,7 @@ def send_poll(
     payload = {
         'chat_id': str(chat_id),
         'question': question,
-        'options': json.dumps(options)}
+        'options': JSON_CODEC.dumps(options)}
 
     if is_anonymous:
         payload['is_anonymous'] = is_anonymous
@@ -1682,7 +2225,7 @@ def convert_input_media_array(array):
 
             media.append(media_dict)
 
-    return json.dumps(media), files
+    return JSON_CODEC.dumps(media), files
 
 
 def _no_encode(func):
@@ -1731,10 +2274,17 @@ class ApiInvalidJSONException(ApiException):
     Telegram API server returns invalid json.
     """
 
-    def __init__(self, function_name, result):
+    def __init__(self, function_name, result, content=None):
+        """
+        :param content: response body as bytes, for responses without a `text` attribute (aiohttp)
+        """
+
+        if content is None:
+            content = result.text.encode('utf8')
+
         super(ApiInvalidJSONException, self).__init__(
             "The server returned an invalid JSON response. "
-            f"Response body:\n[{result.text.encode('utf8')}]",
+            f"Response body:\n[{content}]",
             function_name,
             result
         )
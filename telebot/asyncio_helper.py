@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import logging
+import os
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from telebot import apihelper
+from telebot import exceptions
+from telebot import util
+
+
+logger = logging.getLogger(__name__)
+
+proxy = None
+
+POOL_SIZE = 100
+KEEPALIVE_TIMEOUT = 75
+
+_session = None
+_session_loop = None
+
+
+class _PendingRequest(BaseException):
+    """
+    Raised by the request interceptor to suspend a blocking method until its request has been awaited.
+    Derived from BaseException so that `except Exception` blocks in user code can not swallow it.
+    """
+
+    def __init__(self, request):
+        super(_PendingRequest, self).__init__()
+
+        self.request = request
+
+
+def _get_session():
+    """
+    Returns the shared keep-alive session of the running event loop, creating it on first use.
+    """
+
+    global _session, _session_loop
+
+    if aiohttp is None:
+        raise ImportError("AsyncTeleBot requires aiohttp: pip install aiohttp")
+
+    loop = asyncio.get_running_loop()
+
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        )
+        _session_loop = loop
+
+    return _session
+
+
+async def close_session():
+    """
+    Closes the shared session. Call it before the event loop is closed.
+    """
+
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+    _session = None
+    _session_loop = None
+
+
+def _convert_value(value):
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return value
+
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+
+    return str(value)
+
+
+def _prepare_form(params, files):
+    form = aiohttp.FormData()
+
+    if params:
+        for key, value in params.items():
+            # FormData only takes strings and bytes-like values.
+            form.add_field(key, str(_convert_value(value)))
+
+    for key, value in files.items():
+        if isinstance(value, tuple):
+            filename, value = value[0], value[1]
+        else:
+            filename = os.path.basename(getattr(value, 'name', None) or key)
+
+        form.add_field(key, value, filename=filename)
+
+    return form
+
+
+async def _make_request(token, method_name, method='get', params=None, files=None):
+    """
+    Makes a request to the Telegram API over the shared aiohttp connection pool.
+
+    :param token: The bot's API token. (Created with @BotFather)
+    :param method_name: Name of the API method to be called. (E.g. 'getUpdates')
+    :param method: HTTP method to be used. Defaults to 'get'.
+    :param params: Optional parameters. Should be a dictionary with key-value pairs.
+    :param files: Optional files.
+    :return: The result parsed to a JSON dictionary.
+    """
+
+    if not apihelper.RETRY_ON_FLOOD_WAIT:
+        return await _send_request(token, method_name, method, params, files)
+
+    chat_id = apihelper._get_chat_id(params)
+    offsets = apihelper._file_offsets(files)
+    current_try = 0
+
+    while True:
+        hold = apihelper._flood_hold_delay(chat_id)
+
+        if hold > 0:
+            await asyncio.sleep(hold)
+
+        try:
+            return await _send_request(
+                token, method_name, method, apihelper._copy_params(params), apihelper._rewind_files(files, offsets)
+            )
+
+        except exceptions.RetryAfter as e:
+            current_try += 1
+
+            if current_try > apihelper.MAX_FLOOD_RETRIES:
+                raise
+
+            logger.warning(f"Flood control on {method_name} for chat {chat_id}, retrying in {e.retry_after}s")
+            apihelper._set_flood_hold(chat_id, e.retry_after)
+
+
+async def _send_request(token, method_name, method, params, files):
+    if apihelper.RATE_LIMITER is not None:
+        await apihelper.RATE_LIMITER.acquire_async(method_name, params)
+
+    request_url = f"{apihelper.BASE_URL}{token}/{method_name}"
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request: method={0} url={1} params={2} files={3}".format(method, request_url, params, files))
+
+    connect_timeout, read_timeout = apihelper._pop_timeouts(params)
+
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    data = None
+    headers = None
+
+    if files:
+        data = _prepare_form(params, files)
+        params = None
+
+    elif params and apihelper.BODY_MODE is not None:
+        body = apihelper._json_body(params) if apihelper.BODY_MODE == 'json' else None
+
+        if body is not None:
+            data = body
+            headers = {'Content-Type': 'application/json'}
+
+        else:
+            data = {key: _convert_value(value) for key, value in params.items()}
+
+        method = 'post'
+        params = None
+
+    elif params:
+        params = {key: _convert_value(value) for key, value in params.items()}
+
+    async with _get_session().request(
+        method, request_url, params=params, data=data, headers=headers, timeout=timeout, proxy=proxy
+    ) as result:
+        content = await result.read()
+        status_code = result.status
+
+    try:
+        result_json = apihelper.JSON_CODEC.loads(content)
+
+    except ValueError:
+        raise apihelper.ApiInvalidJSONException(method_name, result, content)
+
+    return apihelper._check_result_json(method_name, status_code, result_json)
+
+
+async def run_method(func, *args, **kwargs):
+    """
+    Runs a blocking TeleBot/apihelper method, performing every API request it makes with `_make_request` above.
+
+    Building a payload and parsing a result never block, so instead of duplicating every method the call is
+    replayed: each run stops at the first request that has no result yet, the request is awaited, and the method
+    is run again with the results collected so far until it returns.
+
+    A method that makes k requests therefore runs k + 1 times (two for almost all API methods), and the code
+    before each request must be cheap and free of side effects. PIL images are encoded once, before the first run.
+
+    :param func: The blocking method to run.
+    :return: Whatever `func` returns.
+    """
+
+    args = [_encode_image(arg) for arg in args]
+    kwargs = {key: _encode_image(value) for key, value in kwargs.items()}
+    results = []
+
+    while True:
+        replay = iter(results)
+
+        def interceptor(token, method_name, method, params, files):
+            try:
+                return next(replay)
+
+            except StopIteration:
+                raise _PendingRequest((token, method_name, method, params, files))
+
+        previous = getattr(util.thread_local, 'request_interceptor', None)
+        util.thread_local.request_interceptor = interceptor
+
+        try:
+            return func(*args, **kwargs)
+
+        except _PendingRequest as e:
+            request = e.request
+
+        finally:
+            util.thread_local.request_interceptor = previous
+
+        results.append(await _make_request(*request))
+
+
+def _encode_image(value):
+    return util.pil_image_to_buffer(value) if util.is_pil_image(value) else value
+
+
+async def download_file(token, file_path):
+    async with _get_session().get(apihelper._file_url(token, file_path), proxy=proxy) as result:
+        if result.status != 200:
+            raise apihelper.ApiException(f"HTTP {result.status} {result.reason}.", 'Download file', result)
+
+        return await result.read()
+
+
+async def iter_download_file(token, file_path, chunk_size=None, offset=0):
+    """
+    Async counterpart of apihelper.iter_download_file: yields the file in chunks, retrying a transfer that
+    breaks off or a reconnection that fails with a Range request up to apihelper.MAX_RETRIES times.
+    """
+
+    url = apihelper._file_url(token, file_path)
+    chunk_size = chunk_size or apihelper.DOWNLOAD_CHUNK_SIZE
+    current_try = 0
+
+    while True:
+        headers = {'Range': f"bytes={offset}-"} if offset else None
+
+        try:
+            async with _get_session().get(url, headers=headers, proxy=proxy) as result:
+                if result.status == 416:
+                    return  # `offset` is the end of the file
+
+                if result.status not in (200, 206):
+                    raise apihelper.ApiException(f"HTTP {result.status} {result.reason}.", 'Download file', result)
+
+                # A server that ignores Range sends the whole file again.
+                skip = offset if result.status == 200 else 0
+
+                async for chunk in result.content.iter_chunked(chunk_size):
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+
+                        chunk = chunk[skip:]
+                        skip = 0
+
+                    offset += len(chunk)
+
+                    yield chunk
+
+                return
+
+        except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            current_try += 1
+
+            if current_try > apihelper.MAX_RETRIES:
+                raise
+
+            logger.warning(f"Download of {file_path} interrupted at byte {offset}, resuming: {e}")
+
+
+async def download_file_to(token, file_path, destination, chunk_size=None, resume=False):
+    """
+    Async counterpart of apihelper.download_file_to.
+
+    :return: number of bytes written
+    """
+
+    if util.is_string(destination):
+        offset = os.path.getsize(destination) if resume and os.path.exists(destination) else 0
+
+        with open(destination, 'ab' if offset else 'wb') as fileobj:
+            return await _write_chunks(iter_download_file(token, file_path, chunk_size, offset), fileobj)
+
+    offset = destination.tell() if resume else 0
+
+    return await _write_chunks(iter_download_file(token, file_path, chunk_size, offset), destination)
+
+
+async def _write_chunks(chunks, fileobj):
+    written = 0
+
+    async for chunk in chunks:
+        fileobj.write(chunk)
+        written += len(chunk)
+
+    return written
@@ -16,6 +16,15 @@ class ChatNotFound(Exception):
         self.error_code = result_json['error_code']
         self.description = result_json['description']
 
+class RetryAfter(Exception):
+    def __init__(self, retry_after, result_json=None):
+        super(RetryAfter, self).__init__(
+            f"Flood control exceeded. Retry in {retry_after} seconds",
+        )
+
+        self.json = result_json
+        self.retry_after = retry_after
+
 class MessageNotFound(Exception):
     pass
 
@@ -2,9 +2,9 @@
 
 
 import logging
-import json
 import six
 
+from telebot import apihelper
 from telebot import util
 
 logger = logging.getLogger('TeleBot')
@@ -16,6 +16,8 @@ class JsonSerializable(object):
     All subclasses of this class must override to_json.
     """
 
+    __slots__ = ()
+
     def to_json(self):
         """
         Returns a JSON string representation of this class.
@@ -33,6 +35,8 @@ class Dictionaryable(object):
     All subclasses of this class must override to_dict.
     """
 
+    __slots__ = ()
+
     def to_dict(self):
         """
         Returns a DICT with class field values
@@ -50,6 +54,8 @@ class JsonDeserializable(object):
     All subclasses of this class must override de_json.
     """
 
+    __slots__ = ()
+
     @classmethod
     def de_json(cls, json_string):
         """
@@ -65,7 +71,7 @@ class JsonDeserializable(object):
     def check_json(json_type):
         """
         Checks whether json_type is a dict or a string. If it is already a dict, it is returned as-is.
-        If it is not, it is converted to a dict by means of json.loads(json_type)
+        If it is not, it is converted to a dict by means of apihelper.JSON_CODEC.loads(json_type)
         :param json_type:
         :return:
         """
@@ -74,7 +80,7 @@ class JsonDeserializable(object):
             return json_type
 
         elif util.is_string(json_type):
-            return json.loads(json_type)
+            return apihelper.JSON_CODEC.loads(json_type)
 
         else:
             raise ValueError("json_type should be a json dict or string.")
@@ -82,9 +88,9 @@ class JsonDeserializable(object):
     def __str__(self):
         d = {}
 
-        for x, y in six.iteritems(self.__dict__):
-            if hasattr(y, '__dict__'):
-                d[x] = y.__dict__
+        for x, y in six.iteritems(_get_attributes(self)):
+            if hasattr(y, '__dict__') or hasattr(y, '__slots__'):
+                d[x] = _get_attributes(y)
 
             else:
                 d[x] = y
@@ -92,6 +98,27 @@ class JsonDeserializable(object):
         return six.text_type(d)
 
 
+def _get_attributes(obj):
+    """
+    Returns the public instance attributes of `obj`, whether they are stored in __dict__ or in __slots__.
+    """
+
+    attributes = dict(getattr(obj, '__dict__', {}))
+
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if name.startswith('_') or name in attributes:
+                continue
+
+            try:
+                attributes[name] = getattr(obj, name)
+
+            except AttributeError:
+                pass
+
+    return attributes
+
+
 class Update(JsonDeserializable):
     @classmethod
     def de_json(cls, json_string):
@@ -135,6 +162,64 @@ class Update(JsonDeserializable):
         self.poll_answer = poll_answer
 
 
+class LazyUpdate(Update):
+    """
+    Update that keeps the raw dict and deserializes the update object only on first access.
+    Messages are deserialized as LazyMessage.
+    """
+
+    _FIELDS = {
+        'message': lambda obj: LazyMessage.de_json(obj),
+        'edited_message': lambda obj: LazyMessage.de_json(obj),
+        'channel_post': lambda obj: LazyMessage.de_json(obj),
+        'edited_channel_post': lambda obj: LazyMessage.de_json(obj),
+        'inline_query': lambda obj: InlineQuery.de_json(obj),
+        'chosen_inline_result': lambda obj: ChosenInlineResult.de_json(obj),
+        'callback_query': lambda obj: CallbackQuery.de_json(obj),
+        'shipping_query': lambda obj: ShippingQuery.de_json(obj),
+        'pre_checkout_query': lambda obj: PreCheckoutQuery.de_json(obj),
+        'poll': lambda obj: Poll.de_json(obj),
+        'poll_answer': lambda obj: PollAnswer.de_json(obj),
+    }
+
+    @classmethod
+    def de_json(cls, json_string):
+        if json_string is None:
+            return None
+
+        return cls(cls.check_json(json_string))
+
+    def __init__(self, obj):
+        self.update_id = obj['update_id']
+        self._obj = obj
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._FIELDS:
+            raise AttributeError(name)
+
+        value = self._FIELDS[name](self._obj.get(name))
+        setattr(self, name, value)
+
+        return value
+
+    def _materialize(self):
+        if '_obj' in self.__dict__:
+            for name in self._FIELDS:
+                getattr(self, name)
+
+            del self._obj
+
+    def __getstate__(self):
+        self._materialize()
+
+        return self.__dict__
+
+    def __str__(self):
+        self._materialize()
+
+        return Update.__str__(self)
+
+
 class WebhookInfo(JsonDeserializable):
     @classmethod
     def de_json(cls, json_string):
@@ -184,6 +269,11 @@ class UserProfilePhotos(JsonDeserializable):
         self.photos = photos
 
 class User(JsonDeserializable, Dictionaryable, JsonSerializable):
+    __slots__ = (
+        'id', 'is_bot', 'first_name', 'last_name', 'username', 'language_code', 'can_join_groups',
+        'can_read_all_group_messages', 'supports_inline_queries'
+    )
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -216,7 +306,7 @@ class User(JsonDeserializable, Dictionaryable, JsonSerializable):
         self.supports_inline_queries = supports_inline_queries
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         return {
@@ -250,6 +340,12 @@ class GroupChat(JsonDeserializable):
 
 
 class Chat(JsonDeserializable):
+    __slots__ = (
+        'id', 'type', 'title', 'username', 'first_name', 'last_name', 'all_members_are_administrators', 'photo',
+        'bio', 'description', 'invite_link', 'pinned_message', 'permissions', 'slow_mode_delay',
+        'sticker_set_name', 'can_set_sticker_set'
+    )
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -295,6 +391,7 @@ class Chat(JsonDeserializable):
         self.last_name = last_name
         self.all_members_are_administrators = all_members_are_administrators
         self.photo = photo
+        self.bio = bio
         self.description = description
         self.invite_link = invite_link
         self.pinned_message = pinned_message
@@ -305,6 +402,17 @@ class Chat(JsonDeserializable):
 
 
 class Message(JsonDeserializable):
+    __slots__ = (
+        'content_type', 'message_id', 'from_user', 'sender_chat', 'date', 'chat', 'forward_from', 'forward_from_chat',
+        'forward_from_message_id', 'forward_signature', 'forward_date', 'reply_to_message', 'via_bot', 'edit_date',
+        'media_group_id', 'author_signature', 'text', 'entities', 'caption_entities', 'audio', 'document', 'game',
+        'photo', 'sticker', 'video', 'video_note', 'voice', 'caption', 'contact', 'location', 'venue', 'animation',
+        'dice', 'new_chat_member', 'new_chat_members', 'left_chat_member', 'new_chat_title', 'new_chat_photo',
+        'delete_chat_photo', 'group_chat_created', 'supergroup_chat_created', 'channel_chat_created',
+        'migrate_to_chat_id', 'migrate_from_chat_id', 'pinned_message', 'invoice', 'successful_payment',
+        'connected_website', 'poll', 'passport_data', 'proximity_alert_triggered', 'json'
+    )
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -378,7 +486,7 @@ class Message(JsonDeserializable):
         if 'caption' in obj:
             opts['caption'] = obj['caption']
         if 'contact' in obj:
-            opts['contact'] = Contact.de_json(json.dumps(obj['contact']))
+            opts['contact'] = Contact.de_json(obj['contact'])
             content_type = 'contact'
         if 'location' in obj:
             opts['location'] = Location.de_json(obj['location'])
@@ -595,7 +703,135 @@ class Message(JsonDeserializable):
         return self.__html_text(self.caption, self.caption_entities)
 
 
+class LazyMessage(Message):
+    """
+    Message that keeps the raw dict and builds nested objects (users, chats, entities, media,
+    replied and pinned messages) on first attribute access. Scalar fields and content_type
+    are set right away, so routing by text, command or content type never builds sub-objects.
+    """
+
+    __slots__ = ('_obj',)
+
+    _CONTENT_TYPES = (
+        'text', 'audio', 'animation', 'document', 'game', 'photo', 'sticker', 'video', 'video_note', 'voice',
+        'contact', 'location', 'venue', 'dice', 'new_chat_members', 'left_chat_member', 'new_chat_title',
+        'new_chat_photo', 'delete_chat_photo', 'group_chat_created', 'supergroup_chat_created',
+        'channel_chat_created', 'migrate_to_chat_id', 'migrate_from_chat_id', 'pinned_message', 'invoice',
+        'successful_payment', 'connected_website', 'poll', 'passport_data', 'proximity_alert_triggered'
+    )
+
+    _SCALARS = (
+        'forward_from_message_id', 'forward_signature', 'forward_date', 'edit_date', 'media_group_id',
+        'author_signature', 'text', 'caption', 'new_chat_title', 'delete_chat_photo', 'group_chat_created',
+        'supergroup_chat_created', 'channel_chat_created', 'migrate_to_chat_id', 'migrate_from_chat_id',
+        'connected_website', 'passport_data'
+    )
+
+    _FIELDS = {
+        'from_user': ('from', lambda obj: User.de_json(obj)),
+        'sender_chat': ('sender_chat', lambda obj: Chat.de_json(obj)),
+        'chat': ('chat', lambda obj: Chat.de_json(obj)),
+        'forward_from': ('forward_from', lambda obj: User.de_json(obj)),
+        'forward_from_chat': ('forward_from_chat', lambda obj: Chat.de_json(obj)),
+        'reply_to_message': ('reply_to_message', lambda obj: LazyMessage.de_json(obj)),
+        'via_bot': ('via_bot', lambda obj: User.de_json(obj)),
+        'entities': ('entities', lambda obj: Message.parse_entities(obj)),
+        'caption_entities': ('caption_entities', lambda obj: Message.parse_entities(obj)),
+        'audio': ('audio', lambda obj: Audio.de_json(obj)),
+        'animation': ('animation', lambda obj: Animation.de_json(obj)),
+        'document': ('document', lambda obj: Document.de_json(obj)),
+        'game': ('game', lambda obj: Game.de_json(obj)),
+        'photo': ('photo', lambda obj: Message.parse_photo(obj)),
+        'sticker': ('sticker', lambda obj: Sticker.de_json(obj)),
+        'video': ('video', lambda obj: Video.de_json(obj)),
+        'video_note': ('video_note', lambda obj: VideoNote.de_json(obj)),
+        'voice': ('voice', lambda obj: Audio.de_json(obj)),
+        'contact': ('contact', lambda obj: Contact.de_json(obj)),
+        'location': ('location', lambda obj: Location.de_json(obj)),
+        'venue': ('venue', lambda obj: Venue.de_json(obj)),
+        'dice': ('dice', lambda obj: Dice.de_json(obj)),
+        'new_chat_members': ('new_chat_members', lambda obj: [User.de_json(member) for member in obj]),
+        'left_chat_member': ('left_chat_member', lambda obj: User.de_json(obj)),
+        'new_chat_photo': ('new_chat_photo', lambda obj: Message.parse_photo(obj)),
+        'pinned_message': ('pinned_message', lambda obj: LazyMessage.de_json(obj)),
+        'invoice': ('invoice', lambda obj: Invoice.de_json(obj)),
+        'successful_payment': ('successful_payment', lambda obj: SuccessfulPayment.de_json(obj)),
+        'poll': ('poll', lambda obj: Poll.de_json(obj)),
+        'proximity_alert_triggered': (
+            'proximity_alert_triggered', lambda obj: ProximityAlertTriggered.de_json(obj)
+        ),
+    }
+
+    @classmethod
+    def de_json(cls, json_string):
+        if json_string is None:
+            return None
+
+        return cls(cls.check_json(json_string), json_string)
+
+    def __init__(self, obj, json_string):
+        self.message_id = obj['message_id']
+        self.date = obj['date']
+        self.content_type = None
+
+        for content_type in self._CONTENT_TYPES:
+            if content_type in obj:
+                self.content_type = content_type
+
+        for name in self._SCALARS:
+            setattr(self, name, obj.get(name))
+
+        self.json = json_string
+        self._obj = obj
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if name in self._FIELDS:
+            key, converter = self._FIELDS[name]
+            value = self._obj.get(key)
+
+            if value is not None:
+                value = converter(value)
+
+        elif name in _MESSAGE_FIELDS:
+            value = None
+
+        else:
+            raise AttributeError(name)
+
+        setattr(self, name, value)
+
+        return value
+
+    def _materialize(self):
+        if self._obj is not None:
+            for name in _MESSAGE_FIELDS:
+                getattr(self, name)
+
+            self._obj = None
+
+    def __getstate__(self):
+        self._materialize()
+
+        state = _get_attributes(self)
+        state['_obj'] = None
+
+        return None, state
+
+    def __str__(self):
+        self._materialize()
+
+        return Message.__str__(self)
+
+
+_MESSAGE_FIELDS = frozenset(Message.__slots__)
+
+
 class MessageEntity(JsonDeserializable):
+    __slots__ = ('type', 'offset', 'length', 'url', 'user')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -635,7 +871,7 @@ class Dice(JsonSerializable, Dictionaryable, JsonDeserializable):
         self.emoji = emoji
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         return {
@@ -645,6 +881,8 @@ class Dice(JsonSerializable, Dictionaryable, JsonDeserializable):
 
 
 class PhotoSize(JsonDeserializable):
+    __slots__ = ('file_id', 'width', 'height', 'file_size')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -911,7 +1149,7 @@ class ForceReply(JsonSerializable):
         json_dict = {'force_reply': True}
         if self.selective:
             json_dict['selective'] = True
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class ReplyKeyboardRemove(JsonSerializable):
@@ -922,7 +1160,7 @@ class ReplyKeyboardRemove(JsonSerializable):
         json_dict = {'remove_keyboard': True}
         if self.selective:
             json_dict['selective'] = True
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class ReplyKeyboardMarkup(JsonSerializable):
@@ -995,7 +1233,7 @@ class ReplyKeyboardMarkup(JsonSerializable):
             json_dict['resize_keyboard'] = True
         if self.selective:
             json_dict['selective'] = True
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class KeyboardButton(Dictionaryable, JsonSerializable):
@@ -1006,7 +1244,7 @@ class KeyboardButton(Dictionaryable, JsonSerializable):
         self.request_poll = request_poll
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = {'text': self.text}
@@ -1096,7 +1334,7 @@ class InlineKeyboardMarkup(Dictionaryable, JsonSerializable):
         https://core.telegram.org/bots/api#inlinekeyboardmarkup
         :return:
         """
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = {'inline_keyboard': self.keyboard}
@@ -1111,7 +1349,7 @@ class LoginUrl(Dictionaryable, JsonSerializable):
         self.request_write_access = request_write_access
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = {'url': self.url}
@@ -1137,7 +1375,7 @@ class InlineKeyboardButton(Dictionaryable, JsonSerializable):
         self.login_url = login_url
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = {'text': self.text}
@@ -1159,6 +1397,8 @@ class InlineKeyboardButton(Dictionaryable, JsonSerializable):
 
 
 class CallbackQuery(JsonDeserializable):
+    __slots__ = ('id', 'from_user', 'message', 'inline_message_id', 'chat_instance', 'data', 'game_short_name')
+
     @classmethod
     def de_json(cls, json_string):
         if json_string is None:
@@ -1302,7 +1542,7 @@ class ChatPermissions(JsonDeserializable, JsonSerializable, Dictionaryable):
             can_change_info, can_invite_users, can_pin_messages)
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = dict()
@@ -1339,7 +1579,7 @@ class BotCommand(JsonSerializable):
         self.description = description
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         return {'command': self.command, 'description': self.description}
@@ -1568,7 +1808,7 @@ class InlineQueryResultArticle(JsonSerializable):
             json_dict['thumb_width'] = self.thumb_width
         if self.thumb_height:
             json_dict['thumb_height'] = self.thumb_height
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultPhoto(JsonSerializable):
@@ -1621,7 +1861,7 @@ class InlineQueryResultPhoto(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultGif(JsonSerializable):
@@ -1668,7 +1908,7 @@ class InlineQueryResultGif(JsonSerializable):
             json_dict['input_message_content'] = self.input_message_content.to_dict()
         if self.gif_duration:
             json_dict['gif_duration'] = self.gif_duration
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultMpeg4Gif(JsonSerializable):
@@ -1720,7 +1960,7 @@ class InlineQueryResultMpeg4Gif(JsonSerializable):
             json_dict['input_message_content'] = self.input_message_content.to_dict()
         if self.mpeg4_duration:
             json_dict['mpeg4_duration '] = self.mpeg4_duration
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultVideo(JsonSerializable):
@@ -1776,7 +2016,7 @@ class InlineQueryResultVideo(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultAudio(JsonSerializable):
@@ -1807,7 +2047,7 @@ class InlineQueryResultAudio(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultVoice(JsonSerializable):
@@ -1838,7 +2078,7 @@ class InlineQueryResultVoice(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultDocument(JsonSerializable):
@@ -1877,7 +2117,7 @@ class InlineQueryResultDocument(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultLocation(JsonSerializable):
@@ -1922,7 +2162,7 @@ class InlineQueryResultLocation(JsonSerializable):
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
 
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultVenue(JsonSerializable):
@@ -1978,7 +2218,7 @@ class InlineQueryResultVenue(JsonSerializable):
         if self.thumb_height:
             json_dict['thumb_height'] = self.thumb_height
 
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultContact(JsonSerializable):
@@ -2009,7 +2249,7 @@ class InlineQueryResultContact(JsonSerializable):
             json_dict['reply_markup'] = self.reply_markup.to_dict()
         if self.input_message_content:
             json_dict['input_message_content'] = self.input_message_content.to_dict()
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class BaseInlineQueryResultCached(JsonSerializable):
@@ -2040,7 +2280,7 @@ class BaseInlineQueryResultCached(JsonSerializable):
             json_dict['input_message_content'] = self.input_message_content.to_dict()
         if self.parse_mode:
             json_dict['parse_mode'] = self.parse_mode
-        return json.dumps(json_dict)
+        return apihelper.JSON_CODEC.dumps(json_dict)
 
 
 class InlineQueryResultCachedPhoto(BaseInlineQueryResultCached):
@@ -2175,7 +2415,7 @@ class InlineQueryResultGame(JsonSerializable):
         json_dic = {'type': self.type, 'id': self.id, 'game_short_name': self.game_short_name}
         if self.reply_markup:
             json_dic['reply_markup'] = self.reply_markup.to_dict()
-        return json.dumps(json_dic)
+        return apihelper.JSON_CODEC.dumps(json_dic)
 
 
 class Game(JsonDeserializable):
@@ -2266,7 +2506,7 @@ class LabeledPrice(JsonSerializable):
         self.amount = amount
 
     def to_json(self):
-        return json.dumps({
+        return apihelper.JSON_CODEC.dumps({
             'label': self.label, 'amount': self.amount
         })
 
@@ -2358,7 +2598,7 @@ class ShippingOption(JsonSerializable):
         price_list = []
         for p in self.prices:
             price_list.append(p.to_dict())
-        json_dict = json.dumps({'id': self.id, 'title': self.title, 'prices': price_list})
+        json_dict = apihelper.JSON_CODEC.dumps({'id': self.id, 'title': self.title, 'prices': price_list})
         return json_dict
 
 
@@ -2521,7 +2761,7 @@ class MaskPosition(Dictionaryable, JsonDeserializable, JsonSerializable):
         self.scale = scale
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         return {'point': self.point, 'x_shift': self.x_shift, 'y_shift': self.y_shift, 'scale': self.scale}
@@ -2545,7 +2785,7 @@ class InputMedia(Dictionaryable, JsonSerializable):
             self._media_dic = 'attach://{0}'.format(self._media_name)
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         json_dict = {'type': self.type, 'media': self._media_dic}
@@ -2568,7 +2808,7 @@ class InputMedia(Dictionaryable, JsonSerializable):
 class InputMediaPhoto(InputMedia):
     def __init__(self, media, caption=None, parse_mode=None):
         if util.is_pil_image(media):
-            media = util.pil_image_to_bytes(media)
+            media = util.pil_image_to_buffer(media)
     
         super(InputMediaPhoto, self).__init__(
             type="photo", media=media, caption=caption, parse_mode=parse_mode
@@ -2682,7 +2922,7 @@ class PollOption(JsonSerializable, JsonDeserializable):
 
     def to_json(self):
         # send_poll Option is a simple string: https://core.telegram.org/bots/api#sendpoll
-        return json.dumps(self.text)
+        return apihelper.JSON_CODEC.dumps(self.text)
 
 
 class Poll(JsonDeserializable):
@@ -2767,7 +3007,7 @@ class PollAnswer(JsonSerializable, JsonDeserializable, Dictionaryable):
         self.options_ids = options_ids
 
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return apihelper.JSON_CODEC.dumps(self.to_dict())
 
     def to_dict(self):
         return {
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
 
+import asyncio
+import collections
+import heapq
 import random
 import re
 import string
 import sys
 import threading
+import time
 import traceback
 import warnings
 import functools
@@ -13,9 +17,20 @@ import logging
 import six
 from six import string_types
 import queue as Queue
+import json
 from PIL import Image
 from io import BytesIO
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 
 logger = logging.getLogger('TeleBot')
 
@@ -36,9 +51,9 @@ class WorkerThread(threading.Thread):
         self.queue = queue
         self.daemon = True
 
-        self.received_task_event = threading.Event()
-        self.done_event = threading.Event()
-        self.exception_event = threading.Event()
+        self.received_task_event = NotifyingEvent()
+        self.done_event = NotifyingEvent()
+        self.exception_event = NotifyingEvent()
         self.continue_event = threading.Event()
 
         self.exception_callback = exception_callback
@@ -87,16 +102,89 @@ class WorkerThread(threading.Thread):
 
 
 class ThreadPool:
-    def __init__(self, num_threads=2):
-        self.tasks = Queue.Queue()
+    """
+    Runs tasks on `num_threads` worker threads.
+
+    :param num_threads: number of worker threads
+    :param max_queue_size: maximum number of waiting tasks, 0 for unbounded
+    :param full_policy: what `put` does when the queue is full:
+        'block' waits for a free slot, 'drop_oldest' discards the longest waiting task,
+        'reject' discards the new task, and a callable discards the new task and is called with (func, args, kwargs)
+    """
+
+    FULL_POLICIES = ('block', 'drop_oldest', 'reject')
+
+    def __init__(self, num_threads=2, max_queue_size=0, full_policy='block'):
+        self._init_queue_policy(max_queue_size, full_policy)
+
+        self.tasks = Queue.Queue(max_queue_size)
         self.workers = [WorkerThread(self.on_exception, self.tasks) for _ in range(num_threads)]
         self.num_threads = num_threads
 
-        self.exception_event = threading.Event()
+        self.exception_event = NotifyingEvent()
         self.exc_info = None
 
+    def _init_queue_policy(self, max_queue_size, full_policy):
+        if not callable(full_policy) and full_policy not in self.FULL_POLICIES:
+            raise ValueError("full_policy must be one of {0} or a callable".format(self.FULL_POLICIES))
+
+        self.max_queue_size = max_queue_size
+        self.full_policy = full_policy
+        self.dropped = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self):
+        """
+        Number of tasks waiting for a worker.
+        """
+
+        return self.tasks.qsize()
+
+    def stats(self):
+        """
+        :return: dict with the number of workers, waiting tasks and dropped and rejected tasks
+        """
+
+        return {
+            'workers': len(self.workers),
+            'queue_depth': self.queue_depth,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+        }
+
     def put(self, func, *args, **kwargs):
-        self.tasks.put((func, args, kwargs))
+        self._enqueue(self.tasks, (func, args, kwargs))
+
+    def _enqueue(self, tasks, task):
+        if not self.max_queue_size or self.full_policy == 'block':
+            tasks.put(task)
+            return
+
+        while True:
+            try:
+                tasks.put_nowait(task)
+                return
+
+            except Queue.Full:
+                pass
+
+            if self.full_policy != 'drop_oldest':
+                self.rejected += 1
+                logger.warning("Task queue is full, rejected {0}".format(task[0]))
+
+                if callable(self.full_policy):
+                    self.full_policy(*task[:3])
+
+                return
+
+            try:
+                tasks.get_nowait()
+                self.dropped += 1
+                logger.warning("Task queue is full, dropped the oldest task")
+
+            except Queue.Empty:
+                pass
 
     def on_exception(self, worker_thread, exc_info):
         self.exc_info = exc_info
@@ -117,6 +205,170 @@ class ThreadPool:
             worker.join()
 
 
+class ShardedThreadPool(ThreadPool):
+    """
+    Thread pool with one queue per worker. Tasks put with the same key always run on the same worker,
+    so they run one at a time and in the order they were put, while tasks with different keys run in parallel.
+    `max_queue_size` bounds the queue of each worker.
+    """
+
+    def __init__(self, num_threads=2, max_queue_size=0, full_policy='block'):
+        self._init_queue_policy(max_queue_size, full_policy)
+
+        self.workers = [WorkerThread(self.on_exception, Queue.Queue(max_queue_size)) for _ in range(num_threads)]
+        self.num_threads = num_threads
+        self.next_worker = 0
+
+        self.exception_event = NotifyingEvent()
+        self.exc_info = None
+
+    @property
+    def queue_depth(self):
+        return sum(worker.queue.qsize() for worker in self.workers)
+
+    def put(self, func, *args, **kwargs):
+        self.next_worker = (self.next_worker + 1) % self.num_threads
+        self._enqueue(self.workers[self.next_worker].queue, (func, args, kwargs))
+
+    def put_keyed(self, key, func, *args, **kwargs):
+        """
+        Puts a task on the worker of `key`. Tasks without a key are spread over the workers.
+        """
+
+        if key is None:
+            self.put(func, *args, **kwargs)
+
+        else:
+            self._enqueue(self.workers[hash(key) % self.num_threads].queue, (func, args, kwargs))
+
+
+class ElasticThreadPool(ThreadPool):
+    """
+    Thread pool that grows from `min_threads` up to `max_threads` workers while tasks have to wait for one,
+    and lets workers above `min_threads` exit after `idle_timeout` seconds without work.
+
+    Workers block on the queue instead of polling it. `stats` adds the number of busy workers and the p50/p99
+    of the time the last `STATS_WINDOW` tasks waited in the queue and ran, in seconds.
+    """
+
+    STATS_WINDOW = 1000
+
+    def __init__(self, min_threads=1, max_threads=16, idle_timeout=30, max_queue_size=0, full_policy='block'):
+        self._init_queue_policy(max_queue_size, full_policy)
+
+        self.tasks = Queue.Queue(max_queue_size)
+        self.min_threads = min_threads
+        self.max_threads = max(min_threads, max_threads)
+        self.idle_timeout = idle_timeout
+        self.workers = []
+        self.idle_workers = 0
+        self.lock = threading.Lock()
+        self.running = True
+
+        self.queue_waits = collections.deque(maxlen=self.STATS_WINDOW)
+        self.task_durations = collections.deque(maxlen=self.STATS_WINDOW)
+
+        self.exception_event = NotifyingEvent()
+        self.exc_info = None
+
+        with self.lock:
+            for _ in range(min_threads):
+                self._add_worker()
+
+    @property
+    def num_threads(self):
+        return len(self.workers)
+
+    def put(self, func, *args, **kwargs):
+        self._enqueue(self.tasks, (func, args, kwargs, time.monotonic()))
+
+        with self.lock:
+            # Every worker is busy, so the task would have to wait: add one.
+            if self.running and self.idle_workers < self.tasks.qsize() and len(self.workers) < self.max_threads:
+                self._add_worker()
+
+    def _add_worker(self):
+        worker = threading.Thread(target=self._work, name="ElasticWorkerThread{0}".format(len(self.workers) + 1))
+        worker.daemon = True
+        self.workers.append(worker)
+        self.idle_workers += 1
+        worker.start()
+
+    def _work(self):
+        while True:
+            try:
+                task = self.tasks.get(timeout=self.idle_timeout)
+
+            except Queue.Empty:
+                with self.lock:
+                    if len(self.workers) > self.min_threads:
+                        self.workers.remove(threading.current_thread())
+                        self.idle_workers -= 1
+                        return
+
+                continue
+
+            with self.lock:
+                self.idle_workers -= 1
+
+            if task is None:
+                return
+
+            func, args, kwargs, put_at = task
+            started_at = time.monotonic()
+            self.queue_waits.append(started_at - put_at)
+
+            try:
+                func(*args, **kwargs)
+
+            except Exception as e:
+                logger.error(type(e).__name__ + " occurred, args=" + str(e.args) + "\n" + traceback.format_exc())
+                self.exc_info = sys.exc_info()
+                self.exception_event.set()
+
+            self.task_durations.append(time.monotonic() - started_at)
+
+            with self.lock:
+                self.idle_workers += 1
+
+    def stats(self):
+        stats = super(ElasticThreadPool, self).stats()
+
+        stats.update({
+            'active_workers': len(self.workers) - self.idle_workers,
+            'queue_wait_p50': percentile(self.queue_waits, 50),
+            'queue_wait_p99': percentile(self.queue_waits, 99),
+            'task_duration_p50': percentile(self.task_durations, 50),
+            'task_duration_p99': percentile(self.task_durations, 99),
+        })
+
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.running = False
+            workers = list(self.workers)
+
+        for _ in workers:
+            self.tasks.put(None)
+
+        for worker in workers:
+            worker.join()
+
+
+def percentile(values, percent):
+    """
+    Returns the `percent` percentile of `values` (nearest rank), or None if there are none.
+    """
+
+    values = sorted(values)
+
+    if not values:
+        return None
+
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
 class AsyncTask:
     def __init__(self, target, *args, **kwargs):
         self.target = target
@@ -143,6 +395,192 @@ class AsyncTask:
             return self.result
 
 
+class TokenBucket:
+    """
+    Token bucket implemented as a virtual schedule (GCRA): `rate` sends per second with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self.tat = 0.0
+
+    def earliest(self, now):
+        """
+        Returns the earliest time a send could happen without exceeding the bucket.
+        """
+
+        return max(now, self.tat - (self.burst - 1) * self.interval)
+
+    def commit(self, send_at):
+        self.tat = max(self.tat, send_at) + self.interval
+
+    def idle(self, now):
+        return self.tat <= now
+
+
+class SlidingWindow:
+    """
+    At most `limit` sends in any `period` seconds. Sends are scheduled in order, so a send is allowed once the
+    `limit`-th previous one is `period` seconds old. Same interface as TokenBucket.
+    """
+
+    def __init__(self, limit, period):
+        self.period = period
+        self.times = collections.deque(maxlen=limit)
+
+    def earliest(self, now):
+        if not self.times:
+            return now
+
+        earliest = max(now, self.times[-1])
+
+        if len(self.times) == self.times.maxlen:
+            earliest = max(earliest, self.times[0] + self.period)
+
+        return earliest
+
+    def commit(self, send_at):
+        self.times.append(send_at)
+
+    def idle(self, now):
+        return not self.times or self.times[-1] + self.period <= now
+
+
+class RateLimiter:
+    """
+    Schedules API calls so they stay within Telegram's documented flood limits:
+    `global_rate` messages per second overall, `private_rate` per second per private chat
+    and `group_rate` per minute per group, supergroup or channel.
+
+    Install it with `apihelper.RATE_LIMITER = util.RateLimiter()`.
+    `queue_depth` is the number of calls currently waiting for a slot.
+    """
+
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self, global_rate=30, private_rate=1, group_rate=20):
+        self.global_rate = global_rate
+        self.global_slots = set()
+        self.global_slot_heap = []
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_buckets = {}
+        self.queue_depth = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def is_limited(method_name):
+        return method_name.startswith('send') or method_name in ('forwardMessage', 'copyMessage')
+
+    @staticmethod
+    def is_group(chat_id):
+        try:
+            return int(chat_id) < 0
+
+        except (TypeError, ValueError):
+            return True  # '@channelusername'
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self.chat_buckets.get(chat_id)
+
+        if bucket is None:
+            if len(self.chat_buckets) >= self.PRUNE_THRESHOLD:
+                self.chat_buckets = {k: v for k, v in six.iteritems(self.chat_buckets) if not v.idle(now)}
+
+            if self.is_group(chat_id):
+                bucket = SlidingWindow(self.group_rate, 60.0)
+
+            else:
+                bucket = TokenBucket(self.private_rate)
+
+            self.chat_buckets[chat_id] = bucket
+
+        return bucket
+
+    def _global_slot(self, earliest, now):
+        """
+        Takes the first free 1/global_rate second slot at or after `earliest`.
+        Slots are kept explicitly because sends delayed by a chat limit are reserved out of order;
+        the heap gives the oldest ones, which are dropped once they have passed.
+        """
+
+        oldest = int(now * self.global_rate) - 1
+
+        while self.global_slot_heap and self.global_slot_heap[0] < oldest:
+            self.global_slots.discard(heapq.heappop(self.global_slot_heap))
+
+        slot = int(earliest * self.global_rate)
+
+        while slot in self.global_slots:
+            slot += 1
+
+        self.global_slots.add(slot)
+        heapq.heappush(self.global_slot_heap, slot)
+
+        return max(earliest, slot / float(self.global_rate))
+
+    def reserve(self, chat_id=None, now=None):
+        """
+        Reserves a slot for a call to `chat_id` and returns how many seconds the caller must wait before sending.
+        """
+
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            if chat_id is None:
+                return self._global_slot(now, now) - now
+
+            bucket = self._chat_bucket(str(chat_id), now)
+            send_at = self._global_slot(bucket.earliest(now), now)
+            bucket.commit(send_at)
+
+        return send_at - now
+
+    def _reserve_request(self, method_name, params):
+        if not self.is_limited(method_name):
+            return 0
+
+        return self.reserve(params.get('chat_id') if params else None)
+
+    def _change_queue_depth(self, delta):
+        with self.lock:
+            self.queue_depth += delta
+
+    def acquire(self, method_name, params=None):
+        """
+        Blocks until the request may be sent.
+        """
+
+        delay = self._reserve_request(method_name, params)
+
+        if delay > 0:
+            self._change_queue_depth(1)
+
+            try:
+                time.sleep(delay)
+
+            finally:
+                self._change_queue_depth(-1)
+
+    async def acquire_async(self, method_name, params=None):
+        """
+        Same as `acquire`, but awaits instead of blocking the event loop.
+        """
+
+        delay = self._reserve_request(method_name, params)
+
+        if delay > 0:
+            self._change_queue_depth(1)
+
+            try:
+                await asyncio.sleep(delay)
+
+            finally:
+                self._change_queue_depth(-1)
+
+
 def async_dec():
     def decorator(fn):
         def wrapper(*args, **kwargs):
@@ -153,6 +591,56 @@ def async_dec():
     return decorator
 
 
+class JsonCodec:
+    """
+    JSON codec backed by the standard json module.
+    Subclass it (e.g. for msgspec) and assign an instance to `apihelper.JSON_CODEC`;
+    every (de)serialization in apihelper and types goes through it.
+    """
+
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj)
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    @staticmethod
+    def dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    @staticmethod
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    @staticmethod
+    def loads(data):
+        return ujson.loads(data)
+
+
+def default_json_codec():
+    """
+    Returns the fastest installed codec: orjson, then ujson, then the json module.
+    """
+
+    if orjson is not None:
+        return OrjsonCodec()
+
+    if ujson is not None:
+        return UjsonCodec()
+
+    return JsonCodec()
+
+
 def is_string(var):
     return isinstance(var, string_types)
 
@@ -171,6 +659,16 @@ def pil_image_to_bytes(image):
 
     return photoBuffer.getvalue()
 
+def pil_image_to_buffer(image):
+    """
+    Encodes `image` as JPEG and returns a memoryview of the encoded data, saving the copy `getvalue()` makes.
+    """
+
+    photoBuffer = BytesIO()
+    image.save(photoBuffer, format='JPEG')
+
+    return photoBuffer.getbuffer()
+
 def is_command(text):
     """
     Checks if `text` is a command. Telegram chat commands start with the '/' character.
@@ -202,7 +700,7 @@ def extract_command(text):
     if text is None:
         return None
 
-    return text.split()[0].split('@')[0][1:] if is_command(text) else None
+    return text.split(None, 1)[0].split('@', 1)[0][1:] if is_command(text) else None
 
 
 def split_string(text, chars_per_string):
@@ -217,47 +715,84 @@ def split_string(text, chars_per_string):
 
     return [text[i:i + chars_per_string] for i in range(0, len(text), chars_per_string)]
 
-# CREDITS TO http://stackoverflow.com/questions/12317940#answer-12320352
-def or_set(self):
-    self._set()
-    self.changed()
+class NotifyingEvent(threading.Event):
+    """
+    threading.Event that calls its listeners whenever it is set or cleared.
+    """
 
+    def __init__(self):
+        super(NotifyingEvent, self).__init__()
 
-def or_clear(self):
-    self._clear()
-    self.changed()
+        self.listeners = []
 
+    def add_listener(self, listener):
+        # Copied on write, so set and clear can call the listeners while another thread changes them.
+        self.listeners = self.listeners + [listener]
 
-def orify(e, changed_callback):
-    e._set = e.set
-    e._clear = e.clear
-    e.changed = changed_callback
-    e.set = lambda: or_set(e)
-    e.clear = lambda: or_clear(e)
+    def remove_listener(self, listener):
+        self.listeners = [other for other in self.listeners if other != listener]
 
-def OrEvent(*events):
-    or_event = threading.Event()
-    def changed():
-        bools = [e.is_set() for e in events]
+    def set(self):
+        super(NotifyingEvent, self).set()
 
-        if any(bools):
-            or_event.set()
+        for listener in self.listeners:
+            listener()
 
-        else:
-            or_event.clear()
+    def clear(self):
+        super(NotifyingEvent, self).clear()
+
+        for listener in self.listeners:
+            listener()
+
+
+class OrEvent:
+    """
+    Event that is set while any of `events` (NotifyingEvent instances) is set.
+    `wait` blocks on a condition variable and wakes as soon as one of them is set.
+    `clear` resets it until one of the events changes again.
+    `close` detaches it from the events; use it as a context manager when the events outlive it.
+    """
+
+    def __init__(self, *events):
+        self.events = events
+        self.condition = threading.Condition()
+        self.flag = False
+
+        for event in events:
+            event.add_listener(self.changed)
+
+        self.changed()
+
+    def changed(self):
+        with self.condition:
+            self.flag = any(event.is_set() for event in self.events)
+
+            if self.flag:
+                self.condition.notify_all()
+
+    def is_set(self):
+        return self.flag
+
+    def clear(self):
+        with self.condition:
+            self.flag = False
+
+    def wait(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.flag, timeout)
+
+    def close(self):
+        for event in self.events:
+            event.remove_listener(self.changed)
 
-    def busy_wait():
-        while not or_event.is_set():
-            or_event._wait(3)
+        self.events = ()
 
-    for e in events:
-        orify(e, changed)
+    def __enter__(self):
+        return self
 
-    or_event._wait = or_event.wait
-    or_event.wait = busy_wait
-    changed()
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
-    return or_event
 
 def extract_arguments(text):
     """
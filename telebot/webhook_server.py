@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from telebot import apihelper, util
+
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookServer:
+    """
+    asyncio webhook server of a TeleBot or AsyncTeleBot, started with `bot.run_webhooks()`.
+
+    Only POST requests to the secret `url_path` are accepted. Each update is acknowledged with 200 as soon as it
+    has been read and queued; a dispatcher task then collects updates for up to `max_batch_delay` seconds after
+    the first one, or until it has `max_batch_size` of them, and hands them to `process_new_updates` as one batch.
+    `received` and `batches` count the updates and batches so far. Connections are kept alive, so Telegram
+    can reuse up to `max_connections` of them. A TeleBot dispatches on a separate thread, so slow non-threaded
+    handlers do not hold up acknowledgements.
+
+    With `reply_in_response` (TeleBot only), each update is instead handled before it is acknowledged, with its
+    handlers run on the request's thread. The first `send*` or `answerCallbackQuery` call a handler makes without
+    files is not sent but returned as the body of the webhook response, which saves a request to the Bot API.
+    That call returns None to the handler, as Telegram reports no result for it.
+    """
+
+    def __init__(
+        self, bot, url_path, max_batch_size=100, max_batch_delay=0.005, max_queue_size=10000,
+        reply_in_response=False
+    ):
+        if web is None:
+            raise ImportError("run_webhooks requires aiohttp: pip install aiohttp")
+
+        self.bot = bot
+        self.url_path = url_path
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.received = 0
+        self.batches = 0
+        self.max_queue_size = max_queue_size
+        self.is_async = inspect.iscoroutinefunction(bot.process_new_updates)
+        self.reply_in_response = reply_in_response
+
+        if reply_in_response and self.is_async:
+            raise ValueError("reply_in_response is only supported by TeleBot")
+
+        self.queue = None
+        self.loop = None
+        self.stopped = None
+        self.port = None
+        self.executor = None
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post(self.url_path, self.handle)
+
+        return app
+
+    async def handle(self, request):
+        body = await request.read()
+
+        try:
+            json_update = apihelper.JSON_CODEC.loads(body)
+
+        except ValueError:
+            return web.Response(status=400)
+
+        if self.reply_in_response:
+            body = await self.loop.run_in_executor(self.executor, self.process_with_reply, json_update)
+
+            if body is not None:
+                return web.Response(body=body, content_type='application/json')
+
+            return web.Response()
+
+        await self.queue.put(json_update)
+        self.received += 1
+
+        return web.Response()
+
+    async def dispatch(self):
+        while True:
+            json_update = await self.queue.get()
+
+            if json_update is None:
+                return
+
+            batch = [json_update]
+            stopping = await self.collect(batch)
+            self.batches += 1
+
+            await self.process(batch)
+
+            if stopping:
+                return
+
+    async def collect(self, batch):
+        """
+        Adds queued updates to `batch` until it is full or `max_batch_delay` has passed.
+
+        :return: True if the server is stopping
+        """
+
+        deadline = self.loop.time() + self.max_batch_delay
+
+        while len(batch) < self.max_batch_size:
+            if self.queue.empty():
+                timeout = deadline - self.loop.time()
+
+                if timeout <= 0:
+                    return False
+
+                try:
+                    json_update = await asyncio.wait_for(self.queue.get(), timeout)
+
+                except asyncio.TimeoutError:
+                    return False
+
+            else:
+                json_update = self.queue.get_nowait()
+
+            if json_update is None:
+                return True
+
+            batch.append(json_update)
+
+        return False
+
+    async def process(self, json_updates):
+        """
+        Dispatches a batch. An update whose middlewares or handlers raise is logged and skipped rather than
+        discarding the rest of the batch: every update has been acknowledged, so Telegram will not resend it.
+        """
+
+        if not self.is_async:
+            await self.loop.run_in_executor(self.executor, self.process_sync, json_updates)
+
+            return
+
+        updates = self.parse(json_updates)
+        util.thread_local.isolate_update_errors = True
+
+        try:
+            await self.bot.process_new_updates(updates)
+
+        except Exception:
+            logger.exception("Exception while dispatching {0} updates".format(len(updates)))
+
+        finally:
+            util.thread_local.isolate_update_errors = False
+
+    def process_sync(self, json_updates):
+        updates = self.parse(json_updates)
+        util.thread_local.isolate_update_errors = True
+
+        try:
+            self.bot.process_new_updates(updates)
+
+        except Exception:
+            logger.exception("Exception while dispatching {0} updates".format(len(updates)))
+
+        finally:
+            util.thread_local.isolate_update_errors = False
+
+    def parse(self, json_updates):
+        """
+        Builds an Update of each JSON update, logging and skipping the ones that can not be parsed.
+        """
+
+        updates = []
+
+        for json_update in json_updates:
+            try:
+                updates.append(self.bot.update_class.de_json(json_update))
+
+            except Exception:
+                logger.exception("Skipped malformed update {0}".format(
+                    json_update.get('update_id') if isinstance(json_update, dict) else json_update
+                ))
+
+        return updates
+
+    @staticmethod
+    def can_reply(method_name):
+        return (method_name.startswith('send') and method_name != 'sendChatAction') or \
+            method_name == 'answerCallbackQuery'
+
+    def process_with_reply(self, json_update):
+        """
+        Handles one update on this thread, capturing the first method call that can be answered in the response.
+
+        :return: JSON body of the captured call, or None
+        """
+
+        captured = []
+
+        def interceptor(token, method_name, method, params, files):
+            if not captured and not files and self.can_reply(method_name):
+                params = dict(params or {})
+                apihelper._pop_timeouts(params)
+                params['method'] = method_name
+                body = apihelper._json_body(params)
+
+                if body is not None:
+                    captured.append(body)
+
+                    return None
+
+            util.thread_local.request_interceptor = None
+
+            try:
+                return apihelper._make_request(token, method_name, method, params, files)
+
+            finally:
+                util.thread_local.request_interceptor = interceptor
+
+        util.thread_local.request_interceptor = interceptor
+        util.thread_local.run_tasks_inline = True
+
+        try:
+            self.process_sync([json_update])
+
+        except Exception:
+            logger.exception("Exception while dispatching update")
+
+        finally:
+            util.thread_local.request_interceptor = None
+            util.thread_local.run_tasks_inline = False
+
+        return captured[0] if captured else None
+
+    async def serve(self, listen='0.0.0.0', port=8443, ssl_context=None, started=None):
+        """
+        Serves until `stop` is called, then dispatches the updates acknowledged so far and returns.
+
+        :param started: optional threading.Event set once the server accepts connections
+        """
+
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.max_queue_size)
+        self.stopped = asyncio.Event()
+        # Batches are dispatched in order on one thread; replies need a thread per concurrent request.
+        self.executor = concurrent.futures.ThreadPoolExecutor(None if self.reply_in_response else 1)
+
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, listen, port, ssl_context=ssl_context)
+        await site.start()
+        self.port = runner.addresses[0][1]
+
+        dispatcher = asyncio.ensure_future(self.dispatch())
+        logger.info("Webhook server listening on {0}:{1}{2}".format(listen, self.port, self.url_path))
+
+        if started is not None:
+            started.set()
+
+        try:
+            await self.stopped.wait()
+
+        finally:
+            await runner.cleanup()
+            await self.queue.put(None)
+            await dispatcher
+
+            if self.is_async and self.bot.handler_tasks:
+                await asyncio.gather(*self.bot.handler_tasks, return_exceptions=True)
+            self.executor.shutdown()
+
+            logger.info("Webhook server stopped.")
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
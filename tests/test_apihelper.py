@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+import sys
+
+sys.path.append('../')
+
+import email.parser
+import email.policy
+import io
+import json
+import threading
+
+import pytest
+
+from telebot import apihelper, exceptions, util
+
+
+def test_req_session_is_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(apihelper, '_shared_session', None)
+    sessions = []
+
+    threads = [threading.Thread(target=lambda: sessions.append(apihelper._get_req_session())) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(set(map(id, sessions))) == 1
+
+
+def test_req_session_pool_configuration(monkeypatch):
+    monkeypatch.setattr(apihelper, '_shared_session', None)
+    monkeypatch.setattr(apihelper, 'POOL_MAXSIZE', 32)
+    monkeypatch.setattr(apihelper, 'POOL_BLOCK', True)
+
+    adapter = apihelper._get_req_session().get_adapter(apihelper.BASE_URL)
+
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block is True
+    assert adapter.poolmanager.connection_pool_kw['socket_options'] == apihelper._keepalive_socket_options()
+
+
+def test_rate_limiter_schedules_private_chat_sends():
+    limiter = util.RateLimiter()
+
+    delays = [limiter.reserve(42, now=100.0) for _ in range(3)]
+
+    assert delays == [0.0, 1.0, 2.0]
+    assert limiter.reserve(43, now=100.0) == pytest.approx(1 / 30.0)
+
+
+def test_rate_limiter_group_and_global_limits():
+    limiter = util.RateLimiter()
+
+    group_delays = [limiter.reserve(-100, now=0.0) for _ in range(45)]
+    assert group_delays[:20] == pytest.approx([i / 30.0 for i in range(20)])
+    assert group_delays[20] == pytest.approx(60.0)
+    assert all(sum(start <= d < start + 60 for d in group_delays) <= 20 for start in group_delays)
+    assert sum(d < 60 for d in group_delays) == 20
+
+    limiter = util.RateLimiter()
+    global_delays = [limiter.reserve(chat_id, now=0.0) for chat_id in range(1, 61)]
+    assert global_delays == pytest.approx([i / 30.0 for i in range(60)])
+
+
+def test_rate_limiter_prunes_passed_global_slots():
+    limiter = util.RateLimiter()
+
+    for i in range(3000):
+        limiter.reserve(i + 1, now=i / 10.0)
+
+    assert len(limiter.global_slots) == len(limiter.global_slot_heap) < 10
+
+
+def test_rate_limiter_only_limits_sending_methods(monkeypatch):
+    limiter = util.RateLimiter(private_rate=0.001)
+    sleeps = []
+    monkeypatch.setattr(util.time, 'sleep', sleeps.append)
+
+    limiter.acquire('getMe')
+    limiter.acquire('sendMessage', {'chat_id': '1'})
+    limiter.acquire('sendMessage', {'chat_id': '1'})
+
+    assert len(sleeps) == 1
+    assert limiter.queue_depth == 0
+
+
+class FakeResponse:
+    def __init__(self, status_code, result_json):
+        self.status_code = status_code
+        self.content = json.dumps(result_json).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+        self.reason = ''
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((url, kwargs))
+
+        return self.responses.pop(0)
+
+
+FLOOD_RESPONSE = FakeResponse(
+    429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests', 'parameters': {'retry_after': 7}}
+)
+
+
+def test_retry_after_exception(monkeypatch):
+    monkeypatch.setattr(apihelper, 'session', FakeSession([FLOOD_RESPONSE]))
+
+    with pytest.raises(exceptions.RetryAfter) as e:
+        apihelper.send_message('TOKEN', 1, 'hi')
+
+    assert e.value.retry_after == 7
+
+
+def test_retry_on_flood_wait_holds_only_that_chat(monkeypatch):
+    sleeps = []
+    fake_session = FakeSession([FLOOD_RESPONSE, FakeResponse(200, {'ok': True, 'result': True})])
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+    monkeypatch.setattr(apihelper, 'RETRY_ON_FLOOD_WAIT', True)
+    monkeypatch.setattr(apihelper, '_flood_holds', {})
+    monkeypatch.setattr(apihelper, '_global_flood_hold', 0.0)
+    monkeypatch.setattr(apihelper.time, 'sleep', sleeps.append)
+
+    assert apihelper.send_message('TOKEN', 1, 'hi', timeout=5) is True
+
+    assert len(fake_session.calls) == 2
+    assert fake_session.calls[1][1]['timeout'][0] == 15
+    assert 6 < sleeps[0] <= 7
+    assert apihelper._flood_hold_delay('1') > 0
+    assert apihelper._flood_hold_delay('2') == 0
+
+
+def test_flood_holds_are_keyed_by_chat_string(monkeypatch):
+    monkeypatch.setattr(apihelper, '_flood_holds', {})
+    monkeypatch.setattr(apihelper, '_global_flood_hold', 0.0)
+
+    apihelper._set_flood_hold(apihelper._get_chat_id({'chat_id': 5}), 10)
+
+    assert apihelper._flood_hold_delay(apihelper._get_chat_id({'chat_id': '5'})) > 9
+    assert apihelper._flood_hold_delay(apihelper._get_chat_id({'chat_id': 6})) == 0
+
+    apihelper._set_flood_hold(apihelper._get_chat_id({}), 20)
+
+    assert None not in apihelper._flood_holds
+    assert apihelper._flood_hold_delay('6') > 19
+    assert apihelper._flood_hold_delay(None) > 19
+
+
+@pytest.mark.parametrize('body_mode', [None, 'form', 'json'])
+def test_body_mode(monkeypatch, body_mode):
+    fake_session = FakeSession([FakeResponse(200, {'ok': True, 'result': True})])
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+    monkeypatch.setattr(apihelper, 'BODY_MODE', body_mode)
+
+    apihelper.get_chat('TOKEN', 1)
+    request_kwargs = fake_session.calls[0][1]
+
+    if body_mode is None:
+        assert request_kwargs['params'] == {'chat_id': 1}
+
+    elif body_mode == 'form':
+        assert request_kwargs['data'] == {'chat_id': 1}
+
+    else:
+        assert json.loads(request_kwargs['data']) == {'chat_id': 1}
+        assert request_kwargs['headers'] == {'Content-Type': 'application/json'}
+
+    assert 'params' not in request_kwargs or body_mode is None
+
+
+def test_check_result_decodes_once(monkeypatch):
+    calls = []
+
+    class CountingCodec(util.JsonCodec):
+        @staticmethod
+        def loads(data):
+            calls.append(data)
+            return json.loads(data)
+
+    monkeypatch.setattr(apihelper, 'JSON_CODEC', CountingCodec())
+
+    assert apihelper._check_result('getMe', FakeResponse(200, {'ok': True, 'result': {'id': 1}})) == {'id': 1}
+    assert len(calls) == 1
+
+
+def test_check_result_invalid_json():
+    response = FakeResponse(502, {})
+    response.content = b'<html>Bad Gateway</html>'
+    response.text = response.content.decode('utf-8')
+
+    with pytest.raises(apihelper.ApiInvalidJSONException):
+        apihelper._check_result('getMe', response)
+
+
+class FakeStreamResponse:
+    def __init__(self, status_code, content, fail_after=None):
+        self.status_code = status_code
+        self.content = content
+        self.reason = ''
+        self.fail_after = fail_after
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise apihelper.requests.exceptions.ChunkedEncodingError('connection broken')
+
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFileSession:
+    """
+    Serves FILE_CONTENT honouring Range headers; the first response can be cut off after `fail_after` bytes.
+    """
+
+    def __init__(self, fail_after=None, ignore_range=False, failed_resumes=0):
+        self.fail_after = fail_after
+        self.ignore_range = ignore_range
+        self.failed_resumes = failed_resumes
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append((url, headers))
+
+        if headers and self.failed_resumes:
+            self.failed_resumes -= 1
+            raise apihelper.ConnectionError('connection refused')
+        offset = int(headers['Range'][6:-1]) if headers and not self.ignore_range else 0
+        fail_after, self.fail_after = self.fail_after, None
+
+        if offset >= len(FILE_CONTENT):
+            return FakeStreamResponse(416, b'')
+
+        return FakeStreamResponse(206 if offset else 200, FILE_CONTENT[offset:], fail_after)
+
+
+FILE_CONTENT = bytes(range(256)) * 40
+
+
+def test_download_file_to_resumes_interrupted_transfer(monkeypatch, tmp_path):
+    fake_session = FakeFileSession(fail_after=4096)
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+    destination = str(tmp_path / 'file.bin')
+
+    assert apihelper.download_file_to('TOKEN', 'documents/file.bin', destination, chunk_size=1024) == len(FILE_CONTENT)
+
+    with open(destination, 'rb') as f:
+        assert f.read() == FILE_CONTENT
+
+    assert fake_session.calls == [
+        ('https://api.telegram.org/file/botTOKEN/documents/file.bin', None),
+        ('https://api.telegram.org/file/botTOKEN/documents/file.bin', {'Range': 'bytes=4096-'}),
+    ]
+
+
+def test_iter_download_file_retries_failed_reconnection(monkeypatch):
+    fake_session = FakeFileSession(fail_after=2048, failed_resumes=1)
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+
+    assert b''.join(apihelper.iter_download_file('TOKEN', 'file.bin', chunk_size=1024)) == FILE_CONTENT
+    assert [headers for url, headers in fake_session.calls] == [None] + [{'Range': 'bytes=2048-'}] * 2
+
+    fake_session = FakeFileSession(fail_after=2048, failed_resumes=apihelper.MAX_RETRIES)
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+
+    with pytest.raises(apihelper.ConnectionError):
+        b''.join(apihelper.iter_download_file('TOKEN', 'file.bin', chunk_size=1024))
+
+
+def test_download_file_to_resume_existing_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(apihelper, 'session', FakeFileSession())
+    destination = tmp_path / 'file.bin'
+    destination.write_bytes(FILE_CONTENT[:1000])
+
+    assert apihelper.download_file_to('TOKEN', 'file.bin', str(destination), resume=True) == len(FILE_CONTENT) - 1000
+    assert destination.read_bytes() == FILE_CONTENT
+
+    # Nothing left to fetch: the server answers 416.
+    assert apihelper.download_file_to('TOKEN', 'file.bin', str(destination), resume=True) == 0
+    assert destination.read_bytes() == FILE_CONTENT
+
+
+def test_iter_download_file_skips_when_range_ignored(monkeypatch):
+    monkeypatch.setattr(apihelper, 'session', FakeFileSession(ignore_range=True))
+
+    chunks = list(apihelper.iter_download_file('TOKEN', 'file.bin', chunk_size=300, offset=1000))
+
+    assert b''.join(chunks) == FILE_CONTENT[1000:]
+    assert max(map(len, chunks)) <= 300
+
+
+def parse_multipart(content_type, body):
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body
+    )
+
+    return {
+        part.get_param('name', header='content-disposition'): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    }
+
+
+def test_multipart_stream_uploads_files_without_buffering(monkeypatch, tmp_path):
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(FILE_CONTENT * 10)
+    monkeypatch.setattr(apihelper, 'UPLOAD_CHUNK_SIZE', 4096)
+    fake_session = FakeSession([FakeResponse(200, {'ok': True, 'result': True})])
+    monkeypatch.setattr(apihelper, 'session', fake_session)
+    monkeypatch.setattr(apihelper, 'BODY_MODE', 'form')
+
+    with open(str(video), 'rb') as f:
+        apihelper.send_data('TOKEN', 1, f, 'video', caption='clip', thumb=memoryview(b'thumbnail'))
+
+        request_kwargs = fake_session.calls[0][1]
+        body = request_kwargs['data']
+        chunks = [bytes(chunk) for chunk in body]
+
+    assert isinstance(body, apihelper._MultipartStream)
+    assert 'files' not in request_kwargs
+
+    assert max(map(len, chunks)) <= 4096
+    assert len(b''.join(chunks)) == len(body)
+    assert parse_multipart(request_kwargs['headers']['Content-Type'], b''.join(chunks)) == {
+        'chat_id': (None, b'1'),
+        'caption': (None, b'clip'),
+        'video': ('video.mp4', FILE_CONTENT * 10),
+        'thumb': ('thumb', b'thumbnail'),
+    }
+
+
+def test_multipart_stream_restarts_on_each_iteration():
+    fileobj = io.BytesIO(b'0123456789')
+    fileobj.seek(4)
+    body = apihelper._MultipartStream.create({'chat_id': 1}, {'document': ('file.txt', fileobj, 'text/plain')})
+
+    first = b''.join(bytes(chunk) for chunk in body)
+
+    assert first == b''.join(bytes(chunk) for chunk in body)
+    assert parse_multipart(body.content_type, first)['document'] == ('file.txt', b'456789')
+
+
+def test_flood_retry_resends_file_from_its_original_position(monkeypatch):
+    bodies = []
+
+    class UploadSession(FakeSession):
+        def request(self, method, url, **kwargs):
+            bodies.append(parse_multipart(kwargs['headers']['Content-Type'], b''.join(map(bytes, kwargs['data']))))
+
+            return super(UploadSession, self).request(method, url, **kwargs)
+
+    upload_session = UploadSession([FLOOD_RESPONSE, FakeResponse(200, {'ok': True, 'result': True})])
+    monkeypatch.setattr(apihelper, 'session', upload_session)
+    monkeypatch.setattr(apihelper, 'RETRY_ON_FLOOD_WAIT', True)
+    monkeypatch.setattr(apihelper, '_flood_holds', {})
+    monkeypatch.setattr(apihelper, '_global_flood_hold', 0.0)
+    monkeypatch.setattr(apihelper.time, 'sleep', lambda seconds: None)
+
+    fileobj = io.BytesIO(b'0123456789')
+    fileobj.seek(4)
+    apihelper.send_data('TOKEN', 1, ('file.txt', fileobj), 'document')
+
+    assert [body['document'] for body in bodies] == [('file.txt', b'456789')] * 2
+
+
+def test_multipart_stream_falls_back_for_unsized_files():
+    class Pipe:
+        def read(self, size=-1):
+            return b''
+
+    assert apihelper._MultipartStream.create(None, {'document': Pipe()}) is None
+    assert apihelper._build_request('post', {'chat_id': 1}, {'document': Pipe()})[1]['files'] is not None
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import sys
+
+sys.path.append('../')
+
+import asyncio
+import inspect
+
+import pytest
+from PIL import Image
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+import telebot
+from telebot import apihelper, asyncio_helper, types, util
+
+
+MESSAGE = {
+    'message_id': 1, 'date': 1435296025, 'text': 'hi',
+    'chat': {'id': 11, 'type': 'private', 'first_name': 'F'},
+}
+
+
+@pytest.fixture()
+def fake_requests(monkeypatch):
+    requests = []
+
+    async def fake_make_request(token, method_name, method='get', params=None, files=None):
+        requests.append((method_name, params))
+
+        if method_name == 'getFile':
+            return {'file_id': params['file_id'], 'file_path': 'photos/1.jpg'}
+
+        return MESSAGE
+
+    monkeypatch.setattr(asyncio_helper, '_make_request', fake_make_request)
+
+    return requests
+
+
+def test_async_method_returns_deserialized_result(fake_requests):
+    bot = telebot.AsyncTeleBot('')
+
+    msg = asyncio.run(bot.send_message(11, 'hi'))
+
+    assert isinstance(msg, types.Message)
+    assert msg.text == 'hi'
+    assert fake_requests == [('sendMessage', {'chat_id': '11', 'text': 'hi'})]
+
+
+def test_async_methods_run_concurrently(fake_requests):
+    bot = telebot.AsyncTeleBot('')
+
+    async def send_all():
+        return await asyncio.gather(*[bot.send_message(i, 'hi') for i in range(100)])
+
+    assert len(asyncio.run(send_all())) == 100
+    assert len(fake_requests) == 100
+
+
+def test_run_method_replays_every_request(fake_requests):
+    url = asyncio.run(asyncio_helper.run_method(apihelper.get_file_url, 'TOKEN', 'abc'))
+
+    assert url.endswith('photos/1.jpg')
+    assert fake_requests == [('getFile', {'file_id': 'abc'})]
+
+
+def test_run_method_runs_once_per_request(fake_requests, monkeypatch):
+    runs = []
+    encoded = []
+
+    def method(token, photo):
+        runs.append(photo)
+        apihelper.get_file(token, 'abc')
+
+        return apihelper.send_photo(token, 11, photo)
+
+    pil_image_to_buffer = util.pil_image_to_buffer
+    monkeypatch.setattr(util, 'pil_image_to_buffer', lambda image: encoded.append(image) or pil_image_to_buffer(image))
+
+    asyncio.run(asyncio_helper.run_method(method, 'TOKEN', Image.new('RGB', (4, 4))))
+
+    assert len(runs) == 3
+    assert len(encoded) == 1
+    assert all(isinstance(photo, memoryview) for photo in runs)
+    assert [method_name for method_name, params in fake_requests] == ['getFile', 'sendPhoto']
+
+
+def test_async_bot_api_methods_are_coroutines():
+    api_methods = [
+        name for name, method in inspect.getmembers(telebot.TeleBot, inspect.isfunction)
+        if not name.startswith('_') and 'apihelper.' in inspect.getsource(method)
+    ] + ['reply_to', 'remove_webhook']
+
+    assert 'set_webhook' in api_methods and 'send_message' in api_methods
+
+    for name in api_methods:
+        method = getattr(telebot.AsyncTeleBot, name)
+        assert inspect.iscoroutinefunction(method) or inspect.isasyncgenfunction(method), name
+
+
+def test_async_bot_starts_no_worker_threads():
+    assert telebot.AsyncTeleBot('').worker_pool is None
+
+
+def test_make_request_reuses_pooled_connection(monkeypatch):
+    peers = set()
+
+    async def handler(request):
+        peers.add(request.transport.get_extra_info('peername'))
+        return web.json_response({'ok': True, 'result': dict(request.query)})
+
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/botTOKEN/{method}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(apihelper, 'BASE_URL', f'http://127.0.0.1:{port}/bot')
+
+        try:
+            results = [
+                await asyncio_helper._make_request('TOKEN', 'sendMessage', 'post', {'chat_id': 1, 'text': 'hi'})
+                for _ in range(5)
+            ]
+
+        finally:
+            await asyncio_helper.close_session()
+            await runner.cleanup()
+
+        return results
+
+    results = asyncio.run(run())
+
+    assert results[0] == {'chat_id': '1', 'text': 'hi'}
+    assert len(peers) == 1
+
+
+def test_make_request_invalid_json(monkeypatch):
+    async def handler(request):
+        return web.Response(status=502, text='<html>Bad Gateway</html>')
+
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/botTOKEN/{method}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(apihelper, 'BASE_URL', f'http://127.0.0.1:{port}/bot')
+
+        try:
+            with pytest.raises(apihelper.ApiInvalidJSONException) as e:
+                await asyncio_helper._make_request('TOKEN', 'getMe')
+
+        finally:
+            await asyncio_helper.close_session()
+            await runner.cleanup()
+
+        return e.value
+
+    assert 'Bad Gateway' in str(asyncio.run(run()))
+
+
+def test_async_polling_runs_handlers_concurrently(monkeypatch):
+    bot = telebot.AsyncTeleBot('', threaded=False)
+    batches = [
+        [
+            {'update_id': i, 'message': dict(MESSAGE, message_id=i, chat=dict(MESSAGE['chat'], id=i))}
+            for i in range(1, 501)
+        ],
+        [{'update_id': 501, 'message': dict(MESSAGE, text='/stop')}],
+    ]
+    handled = []
+    middleware_seen = []
+
+    async def fake_make_request(token, method_name, method='get', params=None, files=None):
+        if method_name == 'getUpdates':
+            if batches:
+                return batches.pop(0)
+
+            await asyncio.sleep(60)
+
+        return True
+
+    monkeypatch.setattr(asyncio_helper, '_make_request', fake_make_request)
+
+    @bot.middleware_handler(update_types=['message'])
+    async def middleware(bot_instance, message):
+        middleware_seen.append(message.message_id)
+
+    @bot.message_handler(commands=['stop'])
+    def stop(message):
+        bot.stop_polling()
+
+    @bot.message_handler(func=lambda m: True)
+    async def handler(message):
+        await asyncio.sleep(0.2)
+        handled.append(message.message_id)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await bot.polling(timeout=1)
+
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+
+    assert len(handled) == 500
+    assert len(middleware_seen) == 501
+    assert bot.last_update_id == 501
+    assert elapsed < 5
+
+
+def test_async_infinity_polling_retries_transport_errors(monkeypatch):
+    bot = telebot.AsyncTeleBot('')
+    responses = [
+        aiohttp.ClientConnectionError('connection reset'),
+        [{'update_id': 1, 'message': dict(MESSAGE, text='boom')}],
+        [{'update_id': 2, 'message': dict(MESSAGE, text='/stop')}],
+    ]
+    handled = []
+
+    async def fake_make_request(token, method_name, method='get', params=None, files=None):
+        if method_name == 'getUpdates':
+            response = responses.pop(0) if responses else []
+
+            if isinstance(response, Exception):
+                raise response
+
+            return response
+
+        return True
+
+    monkeypatch.setattr(asyncio_helper, '_make_request', fake_make_request)
+
+    @bot.middleware_handler(update_types=['message'])
+    def middleware(bot_instance, message):
+        if message.text == 'boom':
+            raise ValueError('middleware failed')
+
+    @bot.message_handler(commands=['stop'])
+    async def stop(message):
+        await asyncio.sleep(0.1)
+        handled.append(message.text)
+        bot.stop_polling()
+
+    asyncio.run(asyncio.wait_for(bot.infinity_polling(timeout=0.1), 10))
+
+    assert handled == ['/stop']
+    assert bot.last_update_id == 2
@@ -3,6 +3,8 @@ import sys
 
 sys.path.append('../')
 
+import asyncio
+import threading
 import time
 import pytest
 import os
@@ -559,3 +561,350 @@ class TestTeleBot:
         tb = telebot.TeleBot(TOKEN)
         permissions = types.ChatPermissions(can_send_messages=True, can_send_polls=False)
         msg = tb.set_chat_permissions(CHAT_ID, permissions)
+
+
+MESSAGE_JSON = {
+    'message_id': 1, 'date': 1435296025, 'text': 'hi',
+    'chat': {'id': 11, 'type': 'private', 'first_name': 'test'},
+}
+
+
+def create_update(update_id, text, reply_to_message=None):
+    message = {
+        'message_id': update_id, 'date': 1435296025, 'text': text,
+        'chat': {'id': 11, 'type': 'private', 'first_name': 'test'},
+    }
+
+    if reply_to_message is not None:
+        message['reply_to_message'] = reply_to_message
+
+    return types.Update.de_json({'update_id': update_id, 'message': message})
+
+
+def test_process_new_updates_routes_batch_in_order():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+    listened = []
+
+    @tb.message_handler(commands=['help'])
+    def help_handler(message):
+        handled.append(('help', message.text))
+
+    @tb.message_handler(regexp='^hello')
+    def hello_handler(message):
+        handled.append(('hello', message.text))
+
+    @tb.message_handler(func=lambda m: True)
+    def default_handler(message):
+        handled.append(('default', message.text))
+
+    tb.set_update_listener(listened.append)
+    tb.process_new_updates([create_update(1, '/help'), create_update(2, 'HELLO there'), create_update(3, 'bye')])
+
+    assert handled == [('help', '/help'), ('hello', 'HELLO there'), ('default', 'bye')]
+    assert len(listened) == 1 and len(listened[0]) == 3
+    assert tb.last_update_id == 3
+
+
+def test_handler_filters_are_compiled_once():
+    tb = telebot.TeleBot('', threaded=False)
+    handler_dict = tb._build_handler_dict(lambda m: None, commands=['start'], content_types=['text'])
+
+    assert callable(handler_dict['test'])
+    assert handler_dict['test'](create_update(1, '/start').message)
+    assert not handler_dict['test'](create_update(2, '/help').message)
+
+    handler_dict = {'function': lambda m: None, 'filters': {'unknown': True}}
+    tb.add_message_handler(handler_dict)
+
+    assert not tb._test_message_handler(handler_dict, create_update(3, 'text').message)
+    assert 'test' in handler_dict
+
+
+def test_next_step_handler_consumes_message():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+
+    @tb.message_handler(func=lambda m: True)
+    def default_handler(message):
+        handled.append('default')
+
+    update = create_update(1, 'first')
+    tb.register_next_step_handler(update.message, lambda m: handled.append('next'))
+    tb.process_new_updates([create_update(2, 'second'), create_update(3, 'third')])
+
+    assert handled == ['next', 'default']
+
+
+def test_middlewares_run_before_handlers():
+    tb = telebot.TeleBot('', threaded=False)
+    seen = []
+
+    @tb.middleware_handler()
+    def default_middleware(bot_instance, update):
+        seen.append(update.update_id)
+
+    @tb.middleware_handler(update_types=['message'])
+    def message_middleware(bot_instance, message):
+        message.text = 'got'
+
+    @tb.message_handler(func=lambda m: m.text == 'got')
+    def handler(message):
+        seen.append(message.text)
+
+    tb.process_new_updates([create_update(1, '/help')])
+
+    assert seen == [1, 'got']
+
+
+def test_command_index_keeps_registration_order():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('start'), commands=['start']))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('func'), func=lambda m: 'first' in m.text))
+    tb.add_message_handler(tb._build_handler_dict(
+        lambda m: handled.append('help'), commands=['help', 'start'], func=lambda m: m.text.endswith('first')
+    ))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('help2'), commands=['help']))
+
+    tb.process_new_updates([
+        create_update(1, '/start'), create_update(2, '/help first'), create_update(3, '/help@bot'),
+        create_update(4, 'not first'), create_update(5, '/unknown'),
+    ])
+
+    assert handled == ['start', 'func', 'help2', 'func']
+
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('unknown'), commands=['unknown']))
+    tb.process_new_updates([create_update(6, '/unknown')])
+
+    assert handled[-1] == 'unknown'
+
+
+def test_regexp_handlers_are_prefiltered_by_combined_pattern():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('digits'), regexp=r'\d+'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('group'), regexp=r'(ab)\1'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('hello'), regexp='^hello'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('photo'), content_types=['photo']))
+
+    index = tb._get_handler_index(tb.message_handlers)
+    assert index.pattern.search('HELLO')
+    assert len(index.others_no_regexp) == 1
+    assert len(index.by_content_type['photo']) == 1
+
+    tb.process_new_updates([
+        create_update(1, 'Hello 42'), create_update(2, 'ABAB'), create_update(3, 'hello'), create_update(4, 'none'),
+    ])
+
+    assert handled == ['digits', 'group', 'hello']
+
+
+def test_regexp_handlers_with_global_flags_are_not_combined():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('a'), regexp='^a'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('b'), regexp='(?s)^b.c'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('hello'), regexp='(?x) hello \\s world'))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('foo'), regexp='foo bar'))
+
+    index = tb._get_handler_index(tb.message_handlers)
+    assert index.pattern.pattern == '(?:^a)|(?:foo bar)'
+    assert len(index.others_no_regexp) == 2
+
+    tb.process_new_updates([
+        create_update(1, 'b\nc'), create_update(2, 'abc'), create_update(3, 'hello world'), create_update(4, 'foo bar'),
+    ])
+
+    assert handled == ['b', 'a', 'hello', 'foo']
+
+
+def test_handlers_are_bucketed_by_content_type():
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('text'), content_types=['text']))
+    tb.add_message_handler(tb._build_handler_dict(lambda m: handled.append('any'), func=lambda m: True))
+    tb.add_message_handler(tb._build_handler_dict(
+        lambda m: handled.append('members'), content_types=['new_chat_members', 'left_chat_member']
+    ))
+
+    index = tb._get_handler_index(tb.message_handlers)
+    assert [entry[0] for entry in index.by_content_type['new_chat_members']] == [1, 2]
+    assert [entry[0] for entry in index.any_content_type] == [1]
+    assert [entry[0] for entry in index.others] == [0, 1]
+
+    service_update = types.Update.de_json({'update_id': 1, 'message': {
+        'message_id': 1, 'date': 1435296025, 'chat': {'id': 11, 'type': 'group', 'title': 'test'},
+        'new_chat_members': [{'id': 12, 'is_bot': False, 'first_name': 'new'}],
+    }})
+    tb.process_new_updates([service_update, create_update(2, 'hi')])
+
+    assert handled == ['any', 'text']
+
+
+def test_pipelined_polling_fetches_while_dispatching(monkeypatch):
+    tb = telebot.TeleBot('', threaded=False)
+    second_fetch = threading.Event()
+    offsets = []
+    overlapped = []
+    batches = [
+        [{'update_id': 5, 'message': MESSAGE_JSON}, {'update_id': 6, 'message': MESSAGE_JSON}],
+        [{'update_id': 7, 'message': MESSAGE_JSON}],
+    ]
+
+    def get_updates(token, offset=None, limit=None, timeout=None, allowed_updates=None):
+        offsets.append(offset)
+
+        if len(offsets) == 2:
+            second_fetch.set()
+
+        if batches:
+            return batches.pop(0)
+
+        tb.stop_polling()
+
+        return []
+
+    monkeypatch.setattr(telebot.apihelper, 'get_updates', get_updates)
+
+    @tb.message_handler(func=lambda m: True)
+    def handler(message):
+        overlapped.append(second_fetch.wait(5))
+
+    tb.polling(pipelined=True)
+
+    assert offsets[:3] == [1, 7, 8]
+    assert overlapped == [True, True, True]
+    assert tb.last_update_id == 7
+
+
+def test_pipelined_polling_survives_failing_handler(monkeypatch):
+    tb = telebot.TeleBot('', threaded=False)
+    handled = []
+    calls = []
+
+    def get_updates(token, offset=None, limit=None, timeout=None, allowed_updates=None):
+        calls.append(offset)
+
+        if len(calls) <= 4:
+            return [{'update_id': offset, 'message': dict(MESSAGE_JSON, message_id=offset)}]
+
+        tb.stop_polling()
+
+        return []
+
+    monkeypatch.setattr(telebot.apihelper, 'get_updates', get_updates)
+
+    @tb.message_handler(func=lambda m: True)
+    def handler(message):
+        handled.append(message.message_id)
+
+        if message.message_id == 1:
+            time.sleep(0.2)  # fail after the polling thread has queued the next batch
+            raise telebot.apihelper.ApiException('Bad Request', 'sendMessage', None)
+
+    polling_thread = threading.Thread(target=tb.polling, kwargs={'none_stop': True, 'pipelined': True}, daemon=True)
+    polling_thread.start()
+    polling_thread.join(10)
+
+    assert not polling_thread.is_alive()
+    assert handled == [1, 2, 3, 4]
+
+
+def test_threaded_polling_stops_without_waiting_for_long_poll(monkeypatch):
+    tb = telebot.TeleBot('')
+    polled = threading.Event()
+
+    def get_updates(token, offset=None, limit=None, timeout=None, allowed_updates=None):
+        polled.set()
+        time.sleep(timeout)
+
+        return []
+
+    monkeypatch.setattr(telebot.apihelper, 'get_updates', get_updates)
+    threading.Thread(target=lambda: polled.wait(5) and tb.stop_polling()).start()
+
+    start = time.time()
+    tb.polling(timeout=30)
+
+    assert time.time() - start < 5
+    assert tb.worker_pool.exception_event.listeners == []
+
+
+def process_handler(message):
+    return os.getpid(), message.text.upper()
+
+
+def test_process_executor_runs_handler_in_worker_process():
+    tb = telebot.TeleBot('', threaded=False, num_processes=1)
+    results = []
+    done = threading.Event()
+
+    def on_result(message, result):
+        results.append((message.message_id, result))
+        done.set()
+
+    tb.message_handler(func=lambda m: True, executor='process', on_result=on_result)(process_handler)
+    tb.process_new_updates([create_update(1, 'hello')])
+
+    assert done.wait(30)
+    tb.stop_bot()
+
+    (message_id, (pid, text)), = results
+    assert message_id == 1
+    assert pid != os.getpid()
+    assert text == 'HELLO'
+
+
+def test_process_results_do_not_wait_for_a_full_worker_pool():
+    tb = telebot.TeleBot('', num_threads=1, max_queue_size=1, num_processes=1)
+    release = threading.Event()
+    results = []
+
+    tb.worker_pool.put(release.wait)
+    tb.worker_pool.put(lambda: None)
+
+    tb.message_handler(func=lambda m: True, executor='process', on_result=lambda m, r: results.append(r[1]))(
+        process_handler
+    )
+    tb.process_new_updates([create_update(1, 'one'), create_update(2, 'two')])
+
+    # The executor keeps completing futures while the results wait for a worker thread.
+    assert tb.process_pool.submit(os.getpid).result(30) != os.getpid()
+
+    release.set()
+    tb.stop_bot()
+
+    assert sorted(results) == ['ONE', 'TWO']
+
+
+def test_process_executor_delivers_results_on_async_bot_loop():
+    tb = telebot.AsyncTeleBot('', num_processes=1)
+    results = []
+
+    async def run():
+        done = asyncio.Event()
+
+        async def on_result(message, result):
+            results.append((asyncio.get_running_loop(), result[1]))
+            done.set()
+
+        tb.message_handler(func=lambda m: True, executor='process', on_result=on_result)(process_handler)
+        await tb.process_new_updates([create_update(1, 'hello')])
+        await asyncio.wait_for(done.wait(), 30)
+
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(run())
+    tb.stop_bot()
+
+    assert results == [(loop, 'HELLO')]
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError):
+        telebot.TeleBot('')._build_handler_dict(lambda m: None, executor='fiber')
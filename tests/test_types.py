@@ -2,7 +2,22 @@
 import sys
 
 sys.path.append('../')
-from telebot import types
+
+import pickle
+
+import pytest
+
+from telebot import apihelper, types, util
+
+
+@pytest.fixture(autouse=True, params=['json', 'orjson', 'ujson'])
+def json_codec(request, monkeypatch):
+    codecs = {'json': util.JsonCodec, 'orjson': util.OrjsonCodec, 'ujson': util.UjsonCodec}
+
+    if request.param != 'json':
+        pytest.importorskip(request.param)
+
+    monkeypatch.setattr(apihelper, 'JSON_CODEC', codecs[request.param]())
 
 
 def test_json_user():
@@ -218,3 +233,93 @@ def test_KeyboardButtonPollType():
     json_str = markup.to_json()
     assert 'request_poll' in json_str
     assert 'quiz' in json_str
+
+
+def test_to_json_round_trip():
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton('Гугл', url='http://www.google.com'))
+    user = types.User(id=1, is_bot=False, first_name='Имя')
+
+    assert apihelper.JSON_CODEC.loads(markup.to_json())['inline_keyboard'][0][0]['text'] == 'Гугл'
+    assert types.User.de_json(user.to_json()).first_name == 'Имя'
+
+
+LAZY_JSON_STRINGS = [
+    r'{"message_id":1,"from":{"id":108929734,"first_name":"Frank","last_name":"Wang","username":"eternnoir","is_bot":true},"chat":{"id":1734,"first_name":"F","type":"private","last_name":"Wa","username":"oir"},"date":1435296025,"text":"/start now","entities":[{"type":"bot_command","offset":0,"length":6}],"reply_to_message":{"message_id":0,"chat":{"id":1734,"type":"private"},"date":1435296020,"text":"hi"}}',
+    r'{"message_id":96,"from":{"id":109734,"first_name":"Fd","last_name":"Wd","username":"dd","is_bot":true },"chat":{"id":10734,"first_name":"Fd","type":"private","last_name":"dd","username":"dd"},"date":1435478191,"photo":[{"file_id":"AgADBQADIagxG8YifgYv8yLSj76i-dd","file_unique_id": "AQAD_QIfa3QAAyA4BgAB","file_size":615,"width":90,"height":67}],"caption":"cap"}',
+    r'{"message_id":5,"chat":{"id":-100,"title":"g","type":"group"},"date":1435296025,"new_chat_members":[{"id":1,"first_name":"A","is_bot":false},{"id":2,"first_name":"B","is_bot":true}]}',
+]
+
+
+def _plain(value):
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+
+    if hasattr(value, '__dict__') or hasattr(value, '__slots__'):
+        return {k: _plain(v) for k, v in types._get_attributes(value).items() if k != 'json' and v is not None}
+
+    return value
+
+
+@pytest.mark.parametrize('json_string', LAZY_JSON_STRINGS)
+def test_lazy_message_matches_message(json_string):
+    msg = types.Message.de_json(json_string)
+    lazy = types.LazyMessage.de_json(json_string)
+
+    for name in types._get_attributes(msg):
+        if name != 'json':
+            assert _plain(getattr(lazy, name)) == _plain(getattr(msg, name)), name
+
+
+def test_lazy_message_builds_sub_objects_on_access():
+    lazy = types.LazyMessage.de_json(LAZY_JSON_STRINGS[0])
+
+    assert lazy.text == '/start now'
+    assert lazy.content_type == 'text'
+    with pytest.raises(AttributeError):
+        object.__getattribute__(lazy, 'reply_to_message')
+
+    assert lazy.chat.id == 1734
+    assert lazy.reply_to_message.text == 'hi'
+    assert lazy.entities[0].type == 'bot_command'
+    assert lazy.sticker is None
+
+    with pytest.raises(AttributeError):
+        lazy.no_such_field
+
+
+def test_lazy_message_pickle():
+    lazy = types.LazyMessage.de_json(LAZY_JSON_STRINGS[0])
+
+    restored = pickle.loads(pickle.dumps(lazy))
+
+    assert restored.from_user.username == 'eternnoir'
+    assert restored.reply_to_message.chat.id == 1734
+    assert restored._obj is None
+    assert 'eternnoir' in str(lazy)
+
+
+def test_lazy_update():
+    json_string = r'{"update_id":938203,"message":{"message_id":241,"from":{"is_bot":true,"id":9734,"first_name":"Fk","last_name":"Wg","username":"nir"},"chat":{"id":1111,"first_name":"Fk","type":"private","last_name":"Wg","username":"oir"},"date":1441447009,"text":"HIHI"}}'
+    update = types.LazyUpdate.de_json(json_string)
+
+    assert update.update_id == 938203
+    assert isinstance(update.message, types.LazyMessage)
+    assert update.message.chat.id == 1111
+    assert update.edited_message is None
+    assert update.callback_query is None
+
+
+def test_slotted_types_pickle_and_str():
+    msg = types.Message.de_json(LAZY_JSON_STRINGS[1])
+
+    assert not hasattr(msg, '__dict__')
+    assert not hasattr(msg.chat, '__dict__')
+
+    restored = pickle.loads(pickle.dumps(msg))
+
+    assert restored.caption == 'cap'
+    assert restored.photo[0].width == 90
+    assert restored.from_user.username == 'dd'
+    assert "'caption': 'cap'" in str(msg)
+    assert "'username': 'dd'" in str(msg)
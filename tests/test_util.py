@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+import sys
+
+sys.path.append('../')
+
+import threading
+import time
+
+import telebot
+from telebot import types, util
+
+
+def test_sharded_thread_pool_keeps_order_per_key():
+    pool = util.ShardedThreadPool(num_threads=4)
+    results = {key: [] for key in range(8)}
+    running = {key: 0 for key in range(8)}
+    overlaps = []
+    done = threading.Semaphore(0)
+
+    def task(key, i):
+        running[key] += 1
+        overlaps.append(running[key] > 1)
+        time.sleep(0.001)
+        results[key].append(i)
+        running[key] -= 1
+        done.release()
+
+    for i in range(20):
+        for key in range(8):
+            pool.put_keyed(key, task, key, i)
+
+    for _ in range(160):
+        done.acquire()
+
+    pool.close()
+
+    assert all(result == list(range(20)) for result in results.values())
+    assert not any(overlaps)
+
+
+def test_chat_ordered_bot_routes_by_chat():
+    tb = telebot.TeleBot('', num_threads=3, chat_ordered=True)
+    threads = {}
+    done = threading.Semaphore(0)
+
+    @tb.message_handler(func=lambda m: True)
+    def handler(message):
+        threads.setdefault(message.chat.id, set()).add(threading.current_thread().name)
+        done.release()
+
+    updates = [
+        types.Update.de_json({'update_id': i, 'message': {
+            'message_id': i, 'date': 1435296025, 'text': 'hi',
+            'chat': {'id': i % 5, 'type': 'private', 'first_name': 'test'},
+        }})
+        for i in range(50)
+    ]
+    tb.process_new_updates(updates)
+
+    for _ in range(50):
+        done.acquire()
+
+    tb.stop_bot()
+
+    assert all(len(names) == 1 for names in threads.values())
+
+
+def test_get_chat_key():
+    callback_query = types.CallbackQuery.de_json({
+        'id': '1', 'chat_instance': '1', 'data': 'x', 'from': {'id': 7, 'is_bot': False, 'first_name': 'test'},
+    })
+
+    assert telebot.TeleBot._get_chat_key(callback_query) == 7
+    assert telebot.TeleBot._get_chat_key(object()) is None
+
+
+def _blocked_pool(**kwargs):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    pool = util.ThreadPool(num_threads=1, max_queue_size=2, **kwargs)
+    pool.put(blocker)
+    started.wait()
+
+    return pool, release
+
+
+def test_thread_pool_drop_oldest():
+    pool, release = _blocked_pool(full_policy='drop_oldest')
+    ran = []
+
+    for i in range(5):
+        pool.put(ran.append, i)
+
+    assert pool.queue_depth == 2
+    assert pool.dropped == 3
+
+    release.set()
+
+    while pool.queue_depth:
+        time.sleep(0.01)
+
+    pool.close()
+
+    assert ran == [3, 4]
+
+
+def test_thread_pool_reject_callback():
+    rejected = []
+    pool, release = _blocked_pool(full_policy=lambda func, args, kwargs: rejected.append(args))
+
+    for i in range(4):
+        pool.put(time.sleep, 0)
+
+    assert pool.rejected == 2
+    assert rejected == [(0,), (0,)]
+
+    release.set()
+    pool.close()
+
+
+def test_thread_pool_block():
+    pool, release = _blocked_pool()
+    pool.put(time.sleep, 0)
+    pool.put(time.sleep, 0)
+
+    putter = threading.Thread(target=pool.put, args=(time.sleep, 0))
+    putter.start()
+    putter.join(0.1)
+
+    assert putter.is_alive()
+
+    release.set()
+    putter.join()
+    pool.close()
+
+    assert pool.dropped == 0 and pool.rejected == 0
+
+
+def test_or_event_wakes_on_any_event():
+    first, second = util.NotifyingEvent(), util.NotifyingEvent()
+    or_event = util.OrEvent(first, second)
+
+    assert not or_event.wait(0.01)
+
+    timer = threading.Timer(0.05, second.set)
+    start = time.time()
+    timer.start()
+
+    assert or_event.wait(5)
+    assert time.time() - start < 1
+
+    or_event.clear()
+    assert not or_event.is_set()
+
+    second.clear()
+    first.set()
+    assert or_event.is_set()
+
+
+def test_or_event_close_detaches_listeners():
+    event = util.NotifyingEvent()
+
+    for _ in range(3):
+        with util.OrEvent(event) as or_event:
+            assert len(event.listeners) == 1
+
+    assert event.listeners == []
+
+    event.set()
+    assert not or_event.is_set()
+
+
+def test_elastic_thread_pool_grows_and_shrinks():
+    pool = util.ElasticThreadPool(min_threads=1, max_threads=4, idle_timeout=0.1)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def task():
+        started.release()
+        release.wait()
+
+    for _ in range(6):
+        pool.put(task)
+
+    for _ in range(4):
+        started.acquire()
+
+    stats = pool.stats()
+    assert stats['workers'] == 4
+    assert stats['active_workers'] == 4
+    assert stats['queue_depth'] == 2
+
+    release.set()
+    deadline = time.time() + 5
+
+    while pool.num_threads > 1 and time.time() < deadline:
+        time.sleep(0.05)
+
+    stats = pool.stats()
+    assert stats['workers'] == 1
+    assert stats['queue_wait_p99'] >= stats['queue_wait_p50'] >= 0
+    assert stats['task_duration_p50'] >= 0
+
+    pool.close()
+
+
+def test_percentile():
+    assert util.percentile([], 50) is None
+    assert util.percentile(range(100), 50) == 50
+    assert util.percentile(range(100), 99) == 99
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+import sys
+
+sys.path.append('../')
+
+import asyncio
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+import telebot
+
+
+def make_update(update_id, text='hi'):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 1435296025, 'text': text,
+            'chat': {'id': 11, 'type': 'private', 'first_name': 'test'},
+        },
+    }
+
+
+def start_webhooks(bot, **kwargs):
+    started = threading.Event()
+    thread = threading.Thread(
+        target=bot.run_webhooks, kwargs=dict(listen='127.0.0.1', port=0, started=started, **kwargs)
+    )
+    thread.start()
+    started.wait(5)
+
+    return thread, 'http://127.0.0.1:{0}'.format(bot.webhook_server.port)
+
+
+async def post_all(url, bodies):
+    async with aiohttp.ClientSession() as session:
+        async def post(body):
+            async with session.post(url, json=body) as response:
+                return response.status
+
+        return await asyncio.gather(*[post(body) for body in bodies])
+
+
+def test_run_webhooks_acknowledges_and_dispatches_all_update_types():
+    bot = telebot.TeleBot('TOKEN', threaded=False)
+    handled = []
+    batches = []
+
+    @bot.message_handler(func=lambda m: True)
+    def message_handler(message):
+        handled.append(message.message_id)
+
+    @bot.callback_query_handler(func=lambda c: True)
+    def callback_handler(callback_query):
+        handled.append(callback_query.data)
+
+    process_new_updates = bot.process_new_updates
+    bot.process_new_updates = lambda updates: batches.append(len(updates)) or process_new_updates(updates)
+
+    thread, base_url = start_webhooks(bot)
+
+    callback_update = {
+        'update_id': 100,
+        'callback_query': {'id': '1', 'chat_instance': '1', 'data': 'pressed',
+                           'from': {'id': 11, 'is_bot': False, 'first_name': 'test'}},
+    }
+    statuses = asyncio.run(post_all(base_url + '/TOKEN/', [make_update(i) for i in range(1, 51)] + [callback_update]))
+    wrong_path = asyncio.run(post_all(base_url + '/wrong/', [make_update(200)]))
+
+    bot.stop_webhooks()
+    thread.join(5)
+
+    assert statuses == [200] * 51
+    assert wrong_path == [404]
+    assert sorted(handled, key=str) == sorted(list(range(1, 51)) + ['pressed'], key=str)
+    assert sum(batches) == 51
+
+
+def test_run_webhooks_with_async_bot():
+    bot = telebot.AsyncTeleBot('TOKEN', threaded=False)
+    handled = []
+
+    @bot.message_handler(func=lambda m: True)
+    async def handler(message):
+        await asyncio.sleep(0)
+        handled.append(message.message_id)
+
+    thread, base_url = start_webhooks(bot)
+    statuses = asyncio.run(post_all(base_url + '/TOKEN/', [make_update(i) for i in range(1, 11)]))
+
+    bot.stop_webhooks()
+    thread.join(5)
+
+    assert statuses == [200] * 10
+    assert sorted(handled) == list(range(1, 11))
+
+
+def test_reply_in_response_returns_first_send_in_webhook_body(monkeypatch):
+    bot = telebot.TeleBot('TOKEN')
+    sent = []
+    results = []
+
+    def fake_send_request(token, method_name, method, params, files):
+        sent.append((method_name, params))
+
+        return True
+
+    monkeypatch.setattr(telebot.apihelper, '_send_request', fake_send_request)
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        bot.send_chat_action(message.chat.id, 'typing')
+        results.append(bot.send_message(message.chat.id, message.text))
+        bot.send_message(message.chat.id, 'second')
+
+    thread, base_url = start_webhooks(bot, reply_in_response=True)
+
+    async def post():
+        async with aiohttp.ClientSession() as session:
+            async with session.post(base_url + '/TOKEN/', json=make_update(1, 'echo')) as response:
+                return response.status, await response.json(content_type=None)
+
+    status, body = asyncio.run(post())
+
+    bot.stop_webhooks()
+    thread.join(5)
+    bot.stop_bot()
+
+    assert status == 200
+    assert body == {'method': 'sendMessage', 'chat_id': '11', 'text': 'echo'}
+    assert results == [None]
+    assert [method_name for method_name, params in sent] == ['sendChatAction', 'sendMessage']
+    assert sent[1][1]['text'] == 'second'
+
+
+def test_webhook_updates_are_micro_batched():
+    bot = telebot.TeleBot('TOKEN', threaded=False)
+    batches = []
+    bot.process_new_updates = lambda updates: batches.append([update.update_id for update in updates])
+
+    thread, base_url = start_webhooks(bot, max_batch_size=8, max_batch_delay=0.5)
+
+    async def post_spaced():
+        async with aiohttp.ClientSession() as session:
+            for i in range(1, 11):
+                async with session.post(base_url + '/TOKEN/', json=make_update(i)) as response:
+                    assert response.status == 200
+
+    asyncio.run(post_spaced())
+    bot.stop_webhooks()
+    thread.join(5)
+
+    assert batches == [[1, 2, 3, 4, 5, 6, 7, 8], [9, 10]]
+    assert bot.webhook_server.received == 10
+    assert bot.webhook_server.batches == 2
+
+
+def test_failing_update_does_not_discard_rest_of_batch():
+    bot = telebot.TeleBot('TOKEN', threaded=False)
+    handled = []
+
+    @bot.middleware_handler(update_types=['message'])
+    def middleware(bot_instance, message):
+        if message.text == 'middleware fails':
+            raise ValueError(message.text)
+
+    @bot.message_handler(func=lambda m: True)
+    def handler(message):
+        if message.text == 'handler fails':
+            raise ValueError(message.text)
+
+        handled.append(message.message_id)
+
+    thread, base_url = start_webhooks(bot, max_batch_size=100, max_batch_delay=0.5)
+
+    malformed = {'update_id': 3, 'message': {'message_id': 3, 'text': 'no chat'}}
+    bodies = [
+        make_update(1), make_update(2, 'handler fails'), malformed, make_update(4, 'middleware fails'), make_update(5),
+    ]
+    statuses = asyncio.run(post_all(base_url + '/TOKEN/', bodies))
+
+    bot.stop_webhooks()
+    thread.join(5)
+
+    assert statuses == [200] * 5
+    assert sorted(handled) == [1, 5]
+    assert bot.webhook_server.batches == 1
+
+
+def test_run_webhooks_closes_certificate_and_session(monkeypatch, tmp_path):
+    bot = telebot.AsyncTeleBot('TOKEN')
+    certificate = tmp_path / 'cert.pem'
+    certificate.write_bytes(b'certificate')
+    uploads = []
+    closed_sessions = []
+
+    async def fake_make_request(token, method_name, method='get', params=None, files=None):
+        uploads.append((method_name, files['certificate']))
+        assert not files['certificate'].closed
+
+        return True
+
+    async def fake_close_session():
+        closed_sessions.append(True)
+
+    monkeypatch.setattr(telebot.asyncio_helper, '_make_request', fake_make_request)
+    monkeypatch.setattr(telebot.asyncio_helper, 'close_session', fake_close_session)
+
+    thread, base_url = start_webhooks(bot, webhook_url='https://example.com/TOKEN/', certificate=str(certificate))
+    bot.stop_webhooks()
+    thread.join(5)
+
+    (method_name, certificate_file), = uploads
+    assert method_name == 'setWebhook'
+    assert certificate_file.closed
+    assert closed_sessions == [True]